@@ -0,0 +1,43 @@
+"""
+多线程下 local 表达式组的吞吐测试
+
+每个线程使用各自的 local 表达式组反复调用 parser 与 execute;
+在 free-threaded (3.13t) 构建下吞吐应随线程数近似线性增长
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import time
+
+from nepattern import FLOAT, INTEGER, create_local_patterns, parser, using_local_patterns
+
+ROUNDS = 200_000
+
+
+def worker(name: str) -> int:
+    with using_local_patterns(name):
+        for _ in range(ROUNDS):
+            parser("num").execute("123")
+    return ROUNDS
+
+
+def bench(threads: int) -> float:
+    names = [f"bench{i}" for i in range(threads)]
+    for i, name in enumerate(names):
+        create_local_patterns(name, {"num": INTEGER if i % 2 else FLOAT}, set_current=False)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        total = sum(pool.map(worker, names))
+    return total / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}")
+    base = None
+    for n in (1, 2, 4, 8):
+        ops = bench(n)
+        base = base or ops
+        print(f"threads={n}: {ops:,.0f} ops/s (x{ops / base:.2f})")
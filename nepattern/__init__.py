@@ -8,6 +8,7 @@ from .base import AntiPattern as AntiPattern
 from .base import AnyString as AnyString
 from .base import BOOLEAN as BOOLEAN
 from .base import BYTES as BYTES
+from .base import ContainerPattern as ContainerPattern
 from .base import DATETIME as DATETIME
 from .base import DICT as DICT
 from .base import DelimiterInt as DelimiterInt
@@ -15,6 +16,7 @@ from .base import DirectPattern as DirectPattern
 from .base import DirectTypePattern as DirectTypePattern
 from .base import EMAIL as EMAIL
 from .base import FLOAT as FLOAT
+from .base import FilePattern as FilePattern
 from .base import HEX as HEX
 from .base import HEX_COLOR as HEX_COLOR
 from .base import INTEGER as INTEGER
@@ -34,18 +36,28 @@ from .base import UnionPattern as UnionPattern
 from .base import WIDE_BOOLEAN as WIDE_BOOLEAN
 from .base import combine as combine
 from .context import Patterns as Patterns
+from .context import PatternsView as PatternsView
 from .context import all_patterns as all_patterns
 from .context import create_local_patterns as create_local_patterns
 from .context import global_patterns
 from .context import local_patterns as local_patterns
+from .context import patterns_view as patterns_view
 from .context import reset_local_patterns as reset_local_patterns
 from .context import switch_local_patterns as switch_local_patterns
+from .context import using_local_patterns as using_local_patterns
+from .core import BatchResult as BatchResult
 from .core import Pattern as Pattern
+from .core import Unmatched as Unmatched
 from .core import ValidateResult as ValidateResult
 from .exception import MatchFailed as MatchFailed
+from .literal import LiteralError as LiteralError
+from .literal import parse_literal as parse_literal
 from .main import parser as parser
+from .spec import register_ref as register_ref
+from .util import DeepCheck as DeepCheck
 from .util import RawStr as RawStr
 from .util import TPattern as TPattern
+from .vector import ArrayResult as ArrayResult
 
 global_patterns().update(
     {
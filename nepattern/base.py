@@ -1,18 +1,48 @@
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime
 from enum import Enum
+from functools import partial
+import mmap
+import os
 from pathlib import Path
 import re
+import stat
 import sys
-from types import MethodType
-from typing import Any, Callable, Final, ForwardRef, Generic, Match, TypeVar, Union, final, overload, cast
-
-from tarina import DateParser, lang
+from types import MethodType, ModuleType
+from typing import (
+    Any,
+    Callable,
+    Final,
+    ForwardRef,
+    Generic,
+    Iterable,
+    Literal,
+    Match,
+    TypeVar,
+    Union,
+    cast,
+    final,
+    overload,
+)
 
-from .core import Pattern, _RegexPattern
+from tarina import LRU, DateParser, Empty
+
+from .core import (
+    _BUILTINS,
+    BatchResult,
+    Pattern,
+    Unmatched,
+    _original,
+    _rebuildable,
+    _RegexPattern,
+    _set_try_match,
+)
 from .exception import MatchFailed
-from .util import TPattern
+from .literal import LiteralError, parse_literal
+from .util import TPattern, _InLiteral, flatten_types, type_checker
+from .vector import ArrayResult, bool_kernel, convert_array
 
 TOrigin = TypeVar("TOrigin")
 TDefault = TypeVar("TDefault")
@@ -30,23 +60,29 @@ _T9 = TypeVar("_T9")
 _TP = TypeVar("_TP", bound=Pattern)
 
 
+class _SpecialValidator:
+    __slots__ = ("pattern",)
+
+    def __init__(self, pattern: Pattern):
+        self.pattern = pattern
+
+    def __call__(self, x):  # pragma: no cover
+        try:
+            return self.pattern.try_match(x).__class__ is not Unmatched
+        except MatchFailed:
+            return False
+
+
+def _special_convert(s, x):  # pragma: no cover
+    return s.try_match(x)
+
+
 def _SpecialPattern(cls: type[_TP]) -> type[_TP]:
     old_init = cls.__init__
 
     def __init__(self, *args, **kwargs):
         old_init(self, *args, **kwargs)
-
-        @self.pre_validate
-        def _(x):  # pragma: no cover
-            try:
-                self.match(x)
-                return True
-            except MatchFailed:
-                return False
-
-        @self.convert
-        def _(s, x):  # pragma: no cover
-            return s.match(x)
+        self.pre_validate(_SpecialValidator(self)).convert(_special_convert)
 
     cls.__init__ = __init__
     return cls
@@ -60,19 +96,14 @@ class DirectPattern(Pattern[TOrigin]):
         self.target = target
         super().__init__(type(target), alias)
 
-    def match(self, input_: Any):
+    def try_match(self, input_: Any):
         if input_ != self.target:
-            raise MatchFailed(
-                lang.require("nepattern", "error.content").format(target=input_, expected=self.target)
-            )
+            return Unmatched("content", input_, self.target)
         return input_
 
     def __eq__(self, other):  # pragma: no cover
         return isinstance(other, DirectPattern) and self.target == other.target
 
-    def copy(self):  # pragma: no cover
-        return DirectPattern(self.target, self.alias)
-
 
 @_SpecialPattern
 class DirectTypePattern(Pattern[TOrigin]):
@@ -82,21 +113,17 @@ class DirectTypePattern(Pattern[TOrigin]):
         self.origin = origin
         super().__init__(origin, alias)
 
-    def match(self, input_: Any):
+    def try_match(self, input_: Any):
         if not isinstance(input_, self.origin):
-            raise MatchFailed(
-                lang.require("nepattern", "error.type").format(
-                    type=input_.__class__, target=input_, expected=self.origin
-                )
-            )
+            return Unmatched("type", input_, self.origin)
         return input_
 
+    def _input_types(self):
+        return flatten_types(self.origin)
+
     def __eq__(self, other):  # pragma: no cover
         return isinstance(other, DirectTypePattern) and self.origin is other.origin
 
-    def copy(self):  # pragma: no cover
-        return DirectTypePattern(self.origin, self.alias)
-
 
 @_SpecialPattern
 class RegexPattern(_RegexPattern[Match[str]]):
@@ -105,24 +132,45 @@ class RegexPattern(_RegexPattern[Match[str]]):
     def __init__(self, pattern: str | TPattern, alias: str | None = None):
         super().__init__(pattern, Match[str], alias=alias or "regex[:group]")
 
-    def match(self, input_: Any) -> Match[str]:
+    def try_match(self, input_: Any) -> Match[str] | Unmatched:
         if not isinstance(input_, str):
-            raise MatchFailed(
-                lang.require("nepattern", "error.type").format(
-                    type=input_.__class__, target=input_, expected="str"
-                )
-            )
+            return Unmatched("type", input_, "str")
         if mat := (re.match(self.pattern, input_) or re.search(self.pattern, input_)):
             return mat
-        raise MatchFailed(
-            lang.require("nepattern", "error.content").format(target=input_, expected=self.pattern)
-        )
+        return Unmatched("content", input_, self.pattern)
+
+    def _input_types(self):
+        return (str,)
 
     def __eq__(self, other):  # pragma: no cover
         return isinstance(other, RegexPattern) and self.pattern == other.pattern
 
-    def copy(self):  # pragma: no cover
-        return RegexPattern(self.pattern, self.alias)
+
+def _accepted_values(pat: Pattern) -> frozenset | None:
+    """子表达式可能接受的全部输入值, 无法确定时返回 None"""
+    if "try_match" in pat.__dict__:
+        return None
+    try:
+        if pat.__class__ is SwitchPattern:
+            return None if Ellipsis in pat.switch else frozenset(pat.switch)
+        if pat.__class__.try_match is not Pattern.try_match:
+            return None
+        if (check := type_checker(pat._accepts)).__class__ is _InLiteral:
+            return frozenset(check.values)  # type: ignore
+    except TypeError:  # 不可哈希的值
+        return None
+
+
+def _disjoint(candidates: tuple[Pattern, ...]) -> bool:
+    """各子表达式接受的输入是否可证明两两不相交"""
+    if len(candidates) < 2:
+        return True
+    seen: set = set()
+    for pat in candidates:
+        if (values := _accepted_values(pat)) is None or not seen.isdisjoint(values):
+            return False
+        seen.update(values)
+    return True
 
 
 @_SpecialPattern
@@ -133,11 +181,22 @@ class UnionPattern(Pattern[_T]):
     # for_validate: list[BasePattern]
     # for_equal: list[str | object]
 
-    __slots__ = ("base", "optional", "for_validate", "for_equal")
+    __slots__ = (
+        "base",
+        "optional",
+        "for_validate",
+        "for_equal",
+        "concurrency",
+        "_equals",
+        "_gates",
+        "_dispatch",
+        "_counts",
+    )
 
     def __init__(self, *base: Any):
         self.base = list(base)
         self.optional = False
+        self.concurrency: int | None = None
         self.for_validate = []
         self.for_equal = []
 
@@ -152,21 +211,134 @@ class UnionPattern(Pattern[_T]):
                     self.for_validate.append(arg)
             else:
                 self.for_equal.append(arg)
+        try:
+            self._equals = frozenset(self.for_equal)
+        except TypeError:
+            self._equals = None
+        self._gates = [(pat, pat._input_types()) for pat in self.for_validate]
+        self._dispatch: dict[type, tuple[Pattern, ...]] = {}
+        self._counts: dict[type, list[int] | None] = {}
         alias_content = "|".join([str(a) for a in self.for_validate] + [repr(a) for a in self.for_equal])  # pragma: no cover
         types = [i.origin for i in self.for_validate] + [type(i) for i in self.for_equal]  # pragma: no cover
         super().__init__(Union.__getitem__(tuple(types)), alias=alias_content)  # type: ignore
 
-    def match(self, input_: Any):
+    def _candidates(self, input_type: type) -> tuple[Pattern, ...]:
+        """筛选出可能接受该输入类型的子表达式, 并按输入类型缓存"""
+        res = []
+        for pat, types in self._gates:
+            try:
+                if types is None or issubclass(input_type, types):
+                    res.append(pat)
+            except TypeError:  # pragma: no cover
+                res.append(pat)
+        self._dispatch[input_type] = candidates = tuple(res)
+        return candidates
+
+    def _input_types(self):
+        if self.for_equal:
+            return None
+        res = []
+        for _, types in self._gates:
+            if types is None:
+                return None
+            res.extend(types)
+        return tuple(res)
+
+    def try_match(self, input_: Any):
         if not input_:
             input_ = None
-        if input_ not in self.for_equal:
-            for pat in self.for_validate:
-                if (res := pat.execute(input_)).success:
-                    return res.value()
-            raise MatchFailed(
-                lang.require("nepattern", "error.content").format(target=input_, expected=self.alias)
-            )
-        return input_
+        try:
+            if input_ in (self.for_equal if self._equals is None else self._equals):
+                return input_
+        except TypeError:
+            if input_ in self.for_equal:
+                return input_
+        if (candidates := self._dispatch.get(input_.__class__)) is None:
+            candidates = self._candidates(input_.__class__)
+        if self._adaptive or (self._adaptive is None and self.adaptive_default):
+            return self._adaptive_match(input_, candidates)
+        for pat in candidates:
+            try:
+                if (res := pat.try_match(input_)).__class__ is not Unmatched:
+                    return res
+            except Exception:
+                continue
+        return Unmatched("content", input_, self.alias)
+
+    def _adaptive_match(self, input_: Any, candidates: tuple[Pattern, ...]):
+        """按输入类型统计各子表达式的命中次数, 命中更多的子表达式会被提前尝试
+
+        仅当该输入类型的各子表达式接受的输入可证明两两不相交时才调整顺序, 否则尝试顺序会改变匹配结果
+        """
+        if (stats := self._adaptive_stats) is None:
+            stats = self._adaptive_stats = [0, 0]
+        if (counts := self._counts.get(input_.__class__, Empty)) is Empty:
+            counts = self._counts[input_.__class__] = [0] * len(candidates) if _disjoint(candidates) else None
+        for index, pat in enumerate(candidates):
+            try:
+                if (res := pat.try_match(input_)).__class__ is Unmatched:
+                    continue
+            except Exception:
+                continue
+            stats[index > 0] += 1
+            if counts is None:
+                return res
+            counts[index] += 1
+            if index and counts[index] > counts[index - 1]:
+                counts[index - 1], counts[index] = counts[index], counts[index - 1]
+                order = list(candidates)
+                order[index - 1], order[index] = order[index], order[index - 1]
+                self._dispatch[input_.__class__] = tuple(order)
+            return res
+        stats[1] += 1
+        return Unmatched("content", input_, self.alias)
+
+    def adaptive(self, enabled: bool | None = True):
+        """设置是否启用自适应排序, 为 None 时跟随 Pattern.adaptive_default
+
+        启用后按输入类型记住命中的子表达式并优先尝试; 仅对接受的输入可证明互不重叠的子表达式 (如 accept 了
+        不相交的 Literal, 或没有默认值的 SwitchPattern) 生效, 其余情况保持原本的顺序, 因此不会改变匹配结果
+        """
+        self._adaptive = enabled
+        self._adaptive_stats = [0, 0] if enabled else None
+        self._dispatch.clear()
+        self._counts.clear()
+        return self
+
+    def adaptive_info(self) -> tuple[int, int] | None:
+        """首个尝试的子表达式即命中的次数, 与其余情况的次数; 未启用时为 None"""
+        return None if self._adaptive_stats is None else (self._adaptive_stats[0], self._adaptive_stats[1])
+
+    @property
+    def is_async(self) -> bool:
+        return any(pat.is_async for pat in self.for_validate)
+
+    async def try_match_async(self, input_: Any):
+        """异步执行匹配, 异步的子表达式会并发执行 (受 concurrency 限制), 结果仍按子表达式的顺序选取"""
+        if not self.is_async:
+            return self.try_match(input_)
+        if not input_:
+            input_ = None
+        try:
+            if input_ in (self.for_equal if self._equals is None else self._equals):
+                return input_
+        except TypeError:
+            if input_ in self.for_equal:
+                return input_
+        if (candidates := self._dispatch.get(input_.__class__)) is None:
+            candidates = self._candidates(input_.__class__)
+        semaphore = asyncio.Semaphore(self.concurrency) if self.concurrency else None
+
+        async def _run(pat: Pattern):
+            if semaphore is None:
+                return await pat.try_match_async(input_)
+            async with semaphore:
+                return await pat.try_match_async(input_)
+
+        for res in await asyncio.gather(*map(_run, candidates), return_exceptions=True):
+            if res.__class__ is not Unmatched and not isinstance(res, BaseException):
+                return res
+        return Unmatched("content", input_, self.alias)
 
     @classmethod
     def of(cls, *types: type[_T1]) -> UnionPattern[_T1]:
@@ -240,15 +412,12 @@ class SwitchPattern(Pattern[_TCase], Generic[_TCase, _TSwtich]):
     def __repr__(self):
         return "|".join(f"{k}" for k in self.switch if k != Ellipsis)
 
-    def match(self, input_: Any) -> _TCase:
-        try:
-            return self.switch[input_]
-        except KeyError as e:
-            if Ellipsis in self.switch:
-                return self.switch[...]
-            raise MatchFailed(
-                lang.require("nepattern", "error.content").format(target=input_, expected=self.__repr__())
-            ) from e
+    def try_match(self, input_: Any) -> _TCase | Unmatched:
+        if (res := self.switch.get(input_, Empty)) is not Empty:
+            return res  # type: ignore
+        if Ellipsis in self.switch:
+            return self.switch[...]
+        return Unmatched("content", input_, self.__repr__())
 
     def __eq__(self, other):  # pragma: no cover
         return isinstance(other, SwitchPattern) and self.switch == other.switch
@@ -256,26 +425,74 @@ class SwitchPattern(Pattern[_TCase], Generic[_TCase, _TSwtich]):
 
 @_SpecialPattern
 class ForwardRefPattern(Pattern[Any]):
-    def __init__(self, ref: ForwardRef):
+    def __init__(
+        self,
+        ref: ForwardRef,
+        namespace: ModuleType | dict[str, Any] | str | None = None,
+        version: Callable[[], Any] | None = None,
+    ):
+        """
+        Args:
+            ref: 前向引用
+            namespace: 解析引用的命名空间, 可为模块, 模块名或 dict, 默认为 __main__
+            version: 返回命名空间版本的函数, 版本变化时重新解析; 否则首次解析成功后一直使用缓存的类型
+        """
         self.ref = ref
+        self.namespace = namespace
+        self.version = version
+        self._resolved: Any = Empty
+        self._resolved_version: Any = None
         super().__init__(alias=ref.__forward_arg__)
 
-    def match(self, input_: Any):
-        if isinstance(input_, str) and input_ == self.ref.__forward_arg__:
-            return input_
-        _main = sys.modules["__main__"]
+    def _globals(self) -> dict[str, Any]:
+        namespace = self.namespace
+        if namespace is None:
+            return sys.modules["__main__"].__dict__
+        if isinstance(namespace, str):
+            return sys.modules[namespace].__dict__
+        if isinstance(namespace, ModuleType):
+            return namespace.__dict__
+        return namespace
+
+    def resolve(self) -> Any:
+        """解析并缓存引用的类型"""
+        version = self.version() if self.version else None
+        if self._resolved is not Empty and version == self._resolved_version:
+            return self._resolved
+        # localns 传入 None 以绕过 ForwardRef 自身的缓存, 使失效后能够重新求值
+        _globals = self._globals()
         if sys.version_info < (3, 9):  # pragma: no cover
-            origin = self.ref._evaluate(_main.__dict__, _main.__dict__)  # type: ignore
+            origin = self.ref._evaluate(_globals, None)  # type: ignore
         else:  # pragma: no cover
-            origin = self.ref._evaluate(_main.__dict__, _main.__dict__, recursive_guard=frozenset())  # type: ignore
-        if not isinstance(input_, origin):  # type: ignore
-            raise MatchFailed(
-                lang.require("nepattern", "error.type").format(
-                    type=input_.__class__, target=input_, expected=self.ref.__forward_arg__
-                )
-            )
+            origin = self.ref._evaluate(_globals, None, recursive_guard=frozenset())  # type: ignore
+        self._resolved, self._resolved_version = origin, version
+        return origin
+
+    def invalidate(self):
+        """清除缓存的类型, 下次匹配时重新解析"""
+        self._resolved = Empty
+        self._resolved_version = None
+
+    def try_match(self, input_: Any):
+        if isinstance(input_, str) and input_ == self.ref.__forward_arg__:
+            return input_
+        if not isinstance(input_, self.resolve()):  # type: ignore
+            return Unmatched("type", input_, self.ref.__forward_arg__)
         return input_
 
+    def _state(self):
+        state = super()._state()
+        state["_resolved"] = Empty
+        state["_resolved_version"] = None
+        if isinstance(self.namespace, ModuleType):
+            state["namespace"] = self.namespace.__name__
+        # ForwardRef 持有不可序列化的代码对象
+        state["ref"] = self.ref.__forward_arg__
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__({**state, "ref": ForwardRef(state["ref"])})
+
     def __eq__(self, other):  # pragma: no cover
         return isinstance(other, ForwardRefPattern) and self.ref == other.ref
 
@@ -286,14 +503,13 @@ class AntiPattern(Pattern[TOrigin]):
         self.base: Pattern[TOrigin] = pattern
         super().__init__(origin=pattern.origin, alias=f"!{pattern}")
 
-    def match(self, input_: Any):
+    def try_match(self, input_: Any):
         try:
-            self.base.match(input_)
+            if self.base.try_match(input_).__class__ is Unmatched:
+                return input_
         except MatchFailed:
             return input_
-        raise MatchFailed(
-            lang.require("nepattern", "error.content").format(target=input_, expected=self.alias)
-        )
+        return Unmatched("content", input_, self.alias)
 
     def __eq__(self, other):  # pragma: no cover
         return isinstance(other, AntiPattern) and self.base == other.base
@@ -310,7 +526,7 @@ class AnyStrPattern(Pattern[str]):
     def __init__(self):
         super().__init__(origin=str, alias="any_str")
 
-    def match(self, input_: Any) -> str:
+    def try_match(self, input_: Any) -> str:
         return str(input_)
 
     def __eq__(self, other):  # pragma: no cover
@@ -327,16 +543,15 @@ class StrPattern(Pattern[str]):
     def __init__(self):
         super().__init__(origin=str, alias="str")
 
-    def match(self, input_: Any) -> str:
+    def try_match(self, input_: Any) -> str | Unmatched:
         if isinstance(input_, str):
             return input_.value if isinstance(input_, Enum) else input_
         elif isinstance(input_, (bytes, bytearray)):
             return input_.decode()
-        raise MatchFailed(
-            lang.require("nepattern", "error.type").format(
-                type=input_.__class__, target=input_, expected="str | bytes | bytearray"
-            )
-        )
+        return Unmatched("type", input_, "str | bytes | bytearray")
+
+    def _input_types(self):
+        return (str, bytes, bytearray)
 
     def __eq__(self, other):  # pragma: no cover
         return other.__class__ is StrPattern
@@ -351,18 +566,17 @@ class BytesPattern(Pattern[bytes]):
     def __init__(self):
         super().__init__(origin=bytes, alias="bytes")
 
-    def match(self, input_: Any) -> bytes:
+    def try_match(self, input_: Any) -> bytes | Unmatched:
         if isinstance(input_, bytes):
             return input_
         elif isinstance(input_, bytearray):  # pragma: no cover
             return bytes(input_)
         elif isinstance(input_, str):
             return input_.encode()
-        raise MatchFailed(
-            lang.require("nepattern", "error.type").format(
-                type=input_.__class__, target=input_, expected="bytes | str"
-            )
-        )
+        return Unmatched("type", input_, "bytes | str")
+
+    def _input_types(self):
+        return (bytes, bytearray, str)
 
     def __eq__(self, other):  # pragma: no cover
         return other.__class__ is BytesPattern
@@ -371,23 +585,60 @@ class BytesPattern(Pattern[bytes]):
 BYTES: Final = BytesPattern()
 
 
+def _int_fast(input_: Any) -> int | type[Empty]:
+    if input_.__class__ is int:
+        return input_
+    if input_.__class__ is str:
+        try:
+            return int(input_)
+        except ValueError:
+            pass
+    return Empty
+
+
+def _float_fast(input_: Any) -> float | type[Empty]:
+    if input_.__class__ is float:
+        return input_
+    if input_.__class__ is str:
+        try:
+            return float(input_)
+        except ValueError:
+            pass
+    return Empty
+
+
+def _bool_fast(mapping: dict[str, bool], input_: Any) -> bool | type[Empty]:
+    if input_ is True or input_ is False:
+        return input_
+    if input_.__class__ is str:
+        return mapping.get(input_.lower(), Empty)
+    return Empty
+
+
 @final
 @_SpecialPattern
 class IntPattern(Pattern[int]):
     def __init__(self):
         super().__init__(origin=int, alias="int")
 
-    def match(self, input_: Any) -> int:
+    def try_match(self, input_: Any) -> int | Unmatched:
         if isinstance(input_, int) and input_ is not True and input_ is not False:
             return input_
         if isinstance(input_, (str, bytes, bytearray)) and len(input_) > 4300:  # pragma: no cover
             raise ValueError("int too large to convert")
         try:
             return int(input_)
-        except (ValueError, TypeError, OverflowError) as e:
-            raise MatchFailed(
-                lang.require("nepattern", "error.content").format(target=input_, expected="int")
-            ) from e
+        except (ValueError, TypeError, OverflowError):
+            return Unmatched("content", input_, "int")
+
+    def execute_many(self, inputs: Iterable[Any], workers: int | None = None) -> BatchResult[int]:
+        if workers:
+            return super().execute_many(inputs, workers)
+        return self._execute_batch(inputs, _int_fast)
+
+    def execute_array(self, inputs: Iterable[Any]) -> ArrayResult:
+        """批量转换为 int64 数组 (未安装 NumPy 时为 array('q'))"""
+        return convert_array(self, inputs, "int")
 
     def __eq__(self, other):  # pragma: no cover
         return other.__class__ is IntPattern
@@ -403,15 +654,22 @@ class FloatPattern(Pattern[float]):
     def __init__(self):
         super().__init__(origin=float, alias="float")
 
-    def match(self, input_: Any) -> float:
+    def try_match(self, input_: Any) -> float | Unmatched:
         if isinstance(input_, float):
             return input_
         try:
             return float(input_)
-        except (TypeError, ValueError) as e:
-            raise MatchFailed(
-                lang.require("nepattern", "error.content").format(target=input_, expected="float")
-            ) from e
+        except (TypeError, ValueError):
+            return Unmatched("content", input_, "float")
+
+    def execute_many(self, inputs: Iterable[Any], workers: int | None = None) -> BatchResult[float]:
+        if workers:
+            return super().execute_many(inputs, workers)
+        return self._execute_batch(inputs, _float_fast)
+
+    def execute_array(self, inputs: Iterable[Any]) -> ArrayResult:
+        """批量转换为 float64 数组 (未安装 NumPy 时为 array('d'))"""
+        return convert_array(self, inputs, "float")
 
     def __eq__(self, other):  # pragma: no cover
         return other.__class__ is FloatPattern
@@ -427,16 +685,18 @@ class NumberPattern(Pattern[Union[int, float]]):
     def __init__(self):
         super().__init__(origin=Union[int, float], alias="number")  # type: ignore
 
-    def match(self, input_: Any) -> int | float:
+    def try_match(self, input_: Any) -> int | float | Unmatched:
         if isinstance(input_, (float, int)):
             return input_
         try:
             res = float(input_)
             return int(res) if res.is_integer() else res
-        except (ValueError, TypeError) as e:
-            raise MatchFailed(
-                lang.require("nepattern", "error.content").format(target=input_, expected="int | float")
-            ) from e
+        except (ValueError, TypeError):
+            return Unmatched("content", input_, "int | float")
+
+    def execute_array(self, inputs: Iterable[Any]) -> ArrayResult:
+        """批量转换为 float64 数组 (未安装 NumPy 时为 array('d'))"""
+        return convert_array(self, inputs, "float")
 
     def __eq__(self, other):  # pragma: no cover
         return other.__class__ is NumberPattern
@@ -452,7 +712,7 @@ class BoolPattern(Pattern[bool]):
     def __init__(self):
         super().__init__(origin=bool, alias="bool")
 
-    def match(self, input_: Any) -> bool:
+    def try_match(self, input_: Any) -> bool | Unmatched:
         if input_ is True or input_ is False:
             return input_
         if isinstance(input_, bytes):  # pragma: no cover
@@ -463,7 +723,20 @@ class BoolPattern(Pattern[bool]):
             return True
         if input_ == "false":
             return False
-        raise MatchFailed(lang.require("nepattern", "error.content").format(target=input_, expected="bool"))
+        return Unmatched("content", input_, "bool")
+
+    BOOL_MAP = {"true": True, "false": False}
+
+    def execute_many(self, inputs: Iterable[Any], workers: int | None = None) -> BatchResult[bool]:
+        if workers:
+            return super().execute_many(inputs, workers)
+        return self._execute_batch(inputs, partial(_bool_fast, self.BOOL_MAP))
+
+    _kernel = staticmethod(bool_kernel(["true"], ["false"]))
+
+    def execute_array(self, inputs: Iterable[Any]) -> ArrayResult:
+        """批量转换为 bool 数组 (未安装 NumPy 时为 array('b'))"""
+        return convert_array(self, inputs, "bool", self._kernel)
 
     def __eq__(self, other):  # pragma: no cover
         return other.__class__ is BoolPattern
@@ -482,7 +755,7 @@ class WideBoolPattern(Pattern[bool]):
     BOOL_FALSE = {0, "0", "off", "f", "false", "n", "no"}
     BOOL_TRUE = {1, "1", "on", "t", "true", "y", "yes"}
 
-    def match(self, input_: Any) -> bool:
+    def try_match(self, input_: Any) -> bool | Unmatched:
         if input_ is True or input_ is False:
             return input_
         if isinstance(input_, bytes):  # pragma: no cover
@@ -494,15 +767,15 @@ class WideBoolPattern(Pattern[bool]):
                 return True
             if input_ in self.BOOL_FALSE:
                 return False
-            raise MatchFailed(
-                lang.require("nepattern", "error.content").format(target=input_, expected="bool")
-            )
-        except (ValueError, TypeError) as e:
-            raise MatchFailed(
-                lang.require("nepattern", "error.type").format(
-                    type=input_.__class__, target=input_, expected="bool"
-                )
-            ) from e
+            return Unmatched("content", input_, "bool")
+        except (ValueError, TypeError):
+            return Unmatched("type", input_, "bool")
+
+    _kernel = staticmethod(bool_kernel(BOOL_TRUE, BOOL_FALSE))
+
+    def execute_array(self, inputs: Iterable[Any]) -> ArrayResult:
+        """批量转换为 bool 数组 (未安装 NumPy 时为 array('b'))"""
+        return convert_array(self, inputs, "bool", self._kernel)
 
     def __eq__(self, other):  # pragma: no cover
         return other.__class__ is BoolPattern
@@ -511,10 +784,107 @@ class WideBoolPattern(Pattern[bool]):
 WIDE_BOOLEAN = WideBoolPattern()
 """宽松布尔表达式，可以接受更多的布尔样式的量"""
 
-LIST: Final[Pattern[list]] = Pattern.regex_convert(r"(\[.+?\])", list, lambda m: eval(m[1]), alias="list", allow_origin=True)
-TUPLE: Final[Pattern[tuple]] = Pattern.regex_convert(r"(\(.+?\))", tuple, lambda m: eval(m[1]), alias="tuple", allow_origin=True)
-SET: Final[Pattern[set]] = Pattern.regex_convert(r"(\{.+?\})", set, lambda m: eval(m[1]), alias="set", allow_origin=True)
-DICT: Final[Pattern[dict]] = Pattern.regex_convert(r"(\{.+?\})", dict, lambda m: eval(m[1]), alias="dict", allow_origin=True)
+
+@_SpecialPattern
+class ContainerPattern(Pattern[TOrigin]):
+    """list, tuple, set 或 dict 字面量的匹配, 可在解析时对元素应用表达式"""
+
+    def __init__(
+        self,
+        origin: type[TOrigin],
+        item: Pattern | None = None,
+        key: Pattern | None = None,
+        value: Pattern | None = None,
+        alias: str | None = None,
+        max_depth: int = 32,
+        max_size: int = 100_000,
+    ):
+        """
+        Args:
+            origin: 容器类型, 为 list, tuple, set 或 dict 之一
+            item: list, tuple 或 set 元素的表达式
+            key: dict 键的表达式
+            value: dict 值的表达式
+            alias: 别名
+            max_depth: 字面量的最大嵌套深度
+            max_size: 字面量中元素数量之和的上限
+        """
+        if origin not in (list, tuple, set, dict):
+            raise TypeError(f"unsupported container type {origin!r}")
+        if (origin is dict and item is not None) or (origin is not dict and (key or value) is not None):
+            raise TypeError("item applies to list, tuple and set; key and value apply to dict")
+        self.item = item
+        self.key = key
+        self.value = value
+        self.max_depth = max_depth
+        self.max_size = max_size
+        if not alias:
+            args = [i for i in (item, key, value) if i is not None]
+            if origin is dict and args:
+                args = [key or ANY, value or ANY]
+            alias = f"{origin.__name__}[{', '.join(map(str, args))}]" if args else origin.__name__
+        super().__init__(origin, alias)
+
+    def _elements(self, input_: Any):
+        if self.origin is dict:
+            key = self.key.try_match if self.key else None
+            value = self.value.try_match if self.value else None
+            result = {}
+            for k, v in input_.items():
+                if key and (k := key(k)).__class__ is Unmatched:
+                    return k
+                if value and (v := value(v)).__class__ is Unmatched:
+                    return v
+                result[k] = v
+            return result
+        result = []
+        for i in input_:
+            if (i := self.item.try_match(i)).__class__ is Unmatched:  # type: ignore
+                return i
+            result.append(i)
+        return self.origin(result)
+
+    def try_match(self, input_: Any) -> TOrigin | Unmatched:
+        if isinstance(input_, self.origin):
+            if self.item is None and self.key is None and self.value is None:
+                return input_
+            return self._elements(input_)
+        if not isinstance(input_, str):
+            return Unmatched("type", input_, f"str | {self.origin.__name__}")
+        try:
+            res = parse_literal(
+                input_,
+                self.max_depth,
+                self.max_size,
+                self.item.try_match if self.item else None,
+                self.key.try_match if self.key else None,
+                self.value.try_match if self.value else None,
+            )
+        except LiteralError:
+            return Unmatched("content", input_, self.alias)
+        if res.__class__ is Unmatched or res.__class__ is self.origin:
+            return res
+        return Unmatched("content", input_, self.alias)
+
+    def _input_types(self):
+        return (str, self.origin)
+
+    def __eq__(self, other):  # pragma: no cover
+        return (
+            isinstance(other, ContainerPattern)
+            and self.origin is other.origin
+            and self.item == other.item
+            and self.key == other.key
+            and self.value == other.value
+            and self.max_depth == other.max_depth
+            and self.max_size == other.max_size
+        )
+
+
+LIST: Final[Pattern[list]] = ContainerPattern(list)
+TUPLE: Final[Pattern[tuple]] = ContainerPattern(tuple)
+SET: Final[Pattern[set]] = ContainerPattern(set)
+DICT: Final[Pattern[dict]] = ContainerPattern(dict)
 
 EMAIL: Final = Pattern.regex_match(r"(?:[\w\.+-]+)@(?:[\w\.-]+)\.(?:[\w\.-]+)", alias="email")
 """匹配邮箱地址的表达式"""
@@ -538,19 +908,16 @@ class HexPattern(Pattern[int]):
     def __init__(self):
         super().__init__(origin=int, alias="hex")
 
-    def match(self, input_: Any) -> int:
+    def try_match(self, input_: Any) -> int | Unmatched:
         if not isinstance(input_, str):
-            raise MatchFailed(
-                lang.require("nepattern", "error.type").format(
-                    type=input_.__class__, target=input_, expected="str"
-                )
-            )
+            return Unmatched("type", input_, "str")
         try:
             return int(input_, 16)
-        except ValueError as e:
-            raise MatchFailed(
-                lang.require("nepattern", "error.content").format(target=input_, expected="hex")
-            ) from e
+        except ValueError:
+            return Unmatched("content", input_, "hex")
+
+    def _input_types(self):
+        return (str,)
 
     def __eq__(self, other):  # pragma: no cover
         return other.__class__ is HexPattern
@@ -563,25 +930,105 @@ HEX_COLOR = Pattern.regex_convert(r"(#[0-9a-fA-F]{6})", str, lambda m: m[1][1:],
 """匹配16进制颜色代码的表达式"""
 
 
+_EPOCH_STRING = re.compile(r"[+-]?\d{9,}(?:\.\d+)?")
+"""时间戳的整数部分至少为 9 位, 避免将年份等较短的数字视作时间戳"""
+_COMPACT_DATE = re.compile(r"\d{8}")
+
+
+def _parse_iso(input_: str) -> datetime | None:
+    try:
+        return datetime.fromisoformat(input_)
+    except ValueError:
+        return None
+
+
+def _parse_compact(input_: str) -> datetime | None:
+    # Python 3.11 之前的 fromisoformat 不支持 20240101 这样的紧凑格式
+    if not _COMPACT_DATE.fullmatch(input_):
+        return None
+    return _parse_format("%Y%m%d", input_)
+
+
+def _parse_epoch(input_: str) -> datetime | None:
+    if not _EPOCH_STRING.fullmatch(input_):
+        return None
+    try:
+        return datetime.fromtimestamp(float(input_) if "." in input_ else int(input_))
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def _parse_format(fmt: str, input_: str) -> datetime | None:
+    try:
+        return datetime.strptime(input_, fmt)
+    except ValueError:
+        return None
+
+
 @final
 @_SpecialPattern
 class DateTimePattern(Pattern[datetime]):
-    def __init__(self):
+    def __init__(self, formats: Iterable[str] = (), cache_size: int = 0):
+        """
+        Args:
+            formats: 额外尝试的 strptime 格式
+            cache_size: 缓存最近解析结果的数量, 为 0 时不缓存
+        """
         super().__init__(origin=datetime, alias="datetime")
+        self.formats = tuple(formats)
+        self.cache_size = cache_size
+        # 按固定的优先级尝试: 纯数字可能同时是紧凑的日期 (如 20240101) 与时间戳, 因此时间戳最后尝试, 结果不随历史输入变化;
+        # 相对时间 (如 1d) 与当日时刻 (如 12:30) 依赖当前时间, 交由 DateParser 处理且不缓存
+        self._parsers = (
+            _parse_iso,
+            *(partial(_parse_format, fmt) for fmt in self.formats),
+            _parse_compact,
+            _parse_epoch,
+        )
+        self._cache = LRU(cache_size) if cache_size > 0 else None
 
-    def match(self, input_: Any) -> datetime:
+    def try_match(self, input_: Any) -> datetime | Unmatched:
         if isinstance(input_, (int, float)):
             return datetime.fromtimestamp(input_)
         if not isinstance(input_, str):
-            raise MatchFailed(
-                lang.require("nepattern", "error.type").format(
-                    type=input_.__class__, target=input_, expected="str | int | float"
-                )
-            )
-        return DateParser.parse(input_)
+            return Unmatched("type", input_, "str | int | float")
+        if (cache := self._cache) is not None and (res := cache.get(input_)) is not None:
+            return res
+        for parser in self._parsers:
+            if (res := parser(input_)) is not None:
+                break
+        else:
+            try:
+                return DateParser.parse(input_)
+            except ValueError:
+                return Unmatched("content", input_, "datetime")
+        if cache is not None:
+            cache[input_] = res
+        return res
+
+    def cache_info(self) -> tuple[int, int] | None:
+        """缓存的命中与未命中次数, 未启用缓存时为 None"""
+        return None if self._cache is None else self._cache.get_stats()
+
+    def _state(self):
+        state = super()._state()
+        state["_cache"] = None
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        if self.cache_size > 0:
+            self._cache = LRU(self.cache_size)
+
+    def _input_types(self):
+        return (int, float, str)
+
+    def execute_array(self, inputs: Iterable[Any]) -> ArrayResult:
+        """批量转换为 datetime64[us] 数组 (未安装 NumPy 时为以微秒计的 array('q'))"""
+        return convert_array(self, inputs, "datetime")
 
     def __eq__(self, other):  # pragma: no cover
-        return other.__class__ is DateTimePattern
+        return other.__class__ is DateTimePattern and self.formats == other.formats
 
 
 DATETIME: Final = DateTimePattern()
@@ -594,16 +1041,14 @@ class PathPattern(Pattern[Path]):
     def __init__(self):
         super().__init__(origin=Path, alias="path")
 
-    def match(self, input_: Any) -> Path:
+    def try_match(self, input_: Any) -> Path | Unmatched:
         if isinstance(input_, Path):
             return input_
 
         try:
             return Path(input_)
-        except (ValueError, TypeError) as e:
-            raise MatchFailed(
-                lang.require("nepattern", "error.content").format(target=input_, expected="PathLike")
-            ) from e
+        except (ValueError, TypeError):
+            return Unmatched("content", input_, "PathLike")
 
     def __eq__(self, other):  # pragma: no cover
         return other.__class__ is PathPattern
@@ -611,14 +1056,97 @@ class PathPattern(Pattern[Path]):
 
 PATH: Final = PathPattern()
 
-PathFile: Final = (
-    Pattern(bytes)
-    .accept(Union[str, Path, bytes])
-    .pre_validate(lambda x: isinstance(x, bytes) or (isinstance(x, (str, Path)) and Path(x).is_file()))
-    .convert(lambda _, x: x if isinstance(x, bytes) else Path(x).read_bytes())
-)
+_FILE_ORIGINS = {"bytes": bytes, "mmap": memoryview, "lazy": Path}
+
 
+def _read_fd(fd: int, size: int) -> bytes:
+    data = os.read(fd, size)
+    if len(data) < size:  # 单次 read 可能读不满 (如超过 2 GiB 或文件正被写入)
+        parts = [data]
+        while chunk := os.read(fd, size - len(data)):
+            parts.append(chunk)
+        data = b"".join(parts)
+    return data
 
+
+@final
+@_SpecialPattern
+class FilePattern(Pattern[Any]):
+    """读取文件内容的表达式, 接受路径或 bytes"""
+
+    def __init__(
+        self,
+        mode: Literal["bytes", "mmap", "lazy"] = "bytes",
+        max_size: int | None = None,
+        alias: str | None = None,
+    ):
+        """
+        Args:
+            mode: bytes 读取全部内容; mmap 返回只读内存映射的 memoryview, 不复制文件内容; lazy 仅检查文件并返回 Path, 由调用方自行打开
+            max_size: 文件 (或 bytes 输入) 的最大字节数, 为 None 时不限制
+            alias: 别名
+        """
+        if mode not in _FILE_ORIGINS:
+            raise ValueError(f"unknown file mode {mode!r}")
+        default = "file" if mode == "bytes" else f"file[{mode}]"
+        super().__init__(origin=_FILE_ORIGINS[mode], alias=alias or default)
+        self.mode = mode
+        self.max_size = max_size
+
+    def _check(self, input_: Any, st: os.stat_result) -> Unmatched | None:
+        if not stat.S_ISREG(st.st_mode):
+            return Unmatched("content", input_, "file")
+        if self.max_size is not None and st.st_size > self.max_size:
+            return Unmatched("content", input_, f"file of at most {self.max_size} bytes")
+
+    def try_match(self, input_: Any) -> Any:
+        if isinstance(input_, bytes) and self.mode != "lazy":
+            if self.max_size is not None and len(input_) > self.max_size:
+                return Unmatched("content", input_, f"bytes of at most {self.max_size} bytes")
+            return memoryview(input_) if self.mode == "mmap" else input_
+        if not isinstance(input_, (str, os.PathLike)):
+            return Unmatched("type", input_, "str | Path" if self.mode == "lazy" else "str | Path | bytes")
+        try:
+            st = os.stat(input_)
+        except (OSError, ValueError):
+            return Unmatched("content", input_, "file")
+        # 先检查再打开, 打开 FIFO 等非常规文件可能一直阻塞
+        if (res := self._check(input_, st)) or self.mode == "lazy":
+            return res or Path(input_)
+        try:
+            fd = os.open(input_, os.O_RDONLY | getattr(os, "O_NONBLOCK", 0) | getattr(os, "O_BINARY", 0))
+        except OSError:
+            return Unmatched("content", input_, "file")
+        try:
+            # 检查与打开之间文件可能被替换, 因此确认打开的是同一文件, 并以打开后的状态为准
+            opened = os.fstat(fd)
+            if (opened.st_dev, opened.st_ino) != (st.st_dev, st.st_ino):
+                return Unmatched("content", input_, "file")
+            if res := self._check(input_, opened):
+                return res
+            st = opened
+            if self.mode == "bytes":
+                return _read_fd(fd, st.st_size)
+            if st.st_size == 0:  # 空文件无法映射
+                return memoryview(b"")
+            return memoryview(mmap.mmap(fd, 0, access=mmap.ACCESS_READ))
+        except OSError:
+            return Unmatched("content", input_, "file")
+        finally:
+            os.close(fd)
+
+    def _input_types(self):
+        return (str, os.PathLike) if self.mode == "lazy" else (str, os.PathLike, bytes)
+
+    def __eq__(self, other):  # pragma: no cover
+        return isinstance(other, FilePattern) and self.mode == other.mode and self.max_size == other.max_size
+
+
+PathFile: Final = FilePattern()
+"""读取文件内容的表达式"""
+
+
+@_rebuildable
 def combine(
     current: Pattern[_T],
     previous: Pattern[Any] | None = None,
@@ -627,26 +1155,28 @@ def combine(
 ) -> Pattern[_T]:
     _new = current.copy()
     if previous:
-        _match = cast(MethodType, _new.match).__func__
+        _match = _original(cast(MethodType, _new.try_match).__func__)
 
-        def match(self, input_):
-            return _match(self, previous.match(input_))
+        def try_match(self, input_):
+            if (res := previous.try_match(input_)).__class__ is Unmatched:
+                return res
+            return _match(self, res)
 
-        _new.match = match.__get__(_new)
+        _set_try_match(_new, try_match)
+        _new._input_types = previous._input_types
     if alias:
         _new.alias = alias
     if validator:
-        _match = cast(MethodType, _new.match).__func__
+        _match = _original(cast(MethodType, _new.try_match).__func__)
 
-        def match(self, input_):
-            res = _match(self, input_)
+        def try_match(self, input_):
+            if (res := _match(self, input_)).__class__ is Unmatched:
+                return res
             if not validator(res):
-                raise MatchFailed(
-                    lang.require("nepattern", "error.content").format(target=input_, expected=alias)
-                )
+                return Unmatched("content", input_, alias)
             return res
 
-        _new.match = match.__get__(_new)
+        _set_try_match(_new, try_match)
     return _new
 
 
@@ -655,3 +1185,5 @@ DelimiterInt = combine(
     Pattern(str).accept(str).convert(lambda _, x: x.replace(",", "_")),
     "DelimInt",
 )
+
+_BUILTINS.update({id(value): name for name, value in list(globals().items()) if isinstance(value, Pattern)})
@@ -1,17 +1,32 @@
 from __future__ import annotations
 
 from collections import UserDict
+from collections.abc import Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import count
 from typing import final
 
 from .base import NONE, UnionPattern
 
+_versions = count()
+
 
 @final
 class Patterns(UserDict):
     def __init__(self, name):
         self.name = name
+        self.version = next(_versions)
         super().__init__({"": NONE})
 
+    def __setitem__(self, key, value):
+        self.data[key] = value
+        self.version = next(_versions)
+
+    def __delitem__(self, key):
+        del self.data[key]
+        self.version = next(_versions)
+
     def set(self, target, alias=None, cover=True, no_alias=False):
         """
         增加可使用的类型转换器
@@ -34,6 +49,7 @@ class Patterns(UserDict):
                     if isinstance(al_pat, UnionPattern)
                     else (UnionPattern(al_pat, target))
                 )
+        self.version = next(_versions)
 
     def sets(self, patterns, cover=True, no_alias=False):
         for pat in patterns:
@@ -60,10 +76,64 @@ class Patterns(UserDict):
                     del self.data[origin_type]
             else:
                 del self.data[origin_type]
+        self.version = next(_versions)
+
+
+@final
+class PatternsView(Mapping):
+    """按顺序查找多个表达式组的只读视图, 不会复制其内容"""
+
+    def __init__(self, *layers: Patterns):
+        self.layers = layers
+        self.name = layers[0].name
+        self._merged = None
+        self._merged_version = None
+
+    @property
+    def version(self):
+        """各表达式组的版本, 任一组被修改后都会改变"""
+        return tuple(layer.version for layer in self.layers)
+
+    def __getitem__(self, key):
+        for layer in self.layers:
+            if key in layer.data:
+                return layer.data[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        for layer in self.layers:
+            if (res := layer.data.get(key)) is not None:
+                return res
+        return default
+
+    def __contains__(self, key):
+        return any(key in layer.data for layer in self.layers)
+
+    def __iter__(self):
+        return iter(self.merged().data)
+
+    def __len__(self):
+        return len(self.merged().data)
+
+    def merged(self) -> Patterns:
+        """获取合并后的表达式组; 仅在某一组被修改后重新构建"""
+        if self._merged is None or self._merged_version != (self.version, self._merged.version):
+            merged = Patterns("$temp")
+            for layer in reversed(self.layers):
+                merged.data.update(layer.data)
+            self._merged = merged
+            self._merged_version = (self.version, merged.version)
+        return self._merged
+
+    def __repr__(self):
+        return f"PatternsView({', '.join(layer.name for layer in self.layers)})"
 
 
 _ctx = {"$global": Patterns("$global")}
-_current = "$global"
+_views = {"$global": PatternsView(_ctx["$global"])}
+_current: ContextVar[str] = ContextVar("nepattern_local_patterns", default="$global")
+_temp = Patterns("$temp")
+_temp_version = _temp.version
 
 
 def create_local_patterns(name, data=None, set_current=True) -> Patterns:
@@ -75,49 +145,77 @@ def create_local_patterns(name, data=None, set_current=True) -> Patterns:
         data: 可选的初始内容
         set_current: 是否设置为 current
     """
-    global _current
     if name.startswith("$"):
         raise ValueError(name)
     new = Patterns(name)
     new.update(data or {})
     _ctx[name] = new
+    _views[name] = PatternsView(new, _ctx["$global"])
     if set_current:
-        _current = name
+        _current.set(name)
     return new
 
 
 def switch_local_patterns(name):
-    global _current
     if name.startswith("$"):
         raise ValueError(name)
     if name not in _ctx:
         raise KeyError(name)
-    _current = name
+    _current.set(name)
 
 
 def reset_local_patterns():
-    global _current
+    _current.set("$global")
+
 
-    _current = "$global"
+@contextmanager
+def using_local_patterns(name):
+    """
+    在当前上下文中临时切换 local 表达式组, 退出时恢复
+
+    current 保存在 ContextVar 中, 不同线程与 asyncio 任务之间互不影响
+    """
+    if name.startswith("$"):
+        raise ValueError(name)
+    if name not in _ctx:
+        raise KeyError(name)
+    token = _current.set(name)
+    try:
+        yield _ctx[name]
+    finally:
+        _current.reset(token)
 
 
 def local_patterns():
-    local = _ctx[_current]
-    return local if local.name != "$global" else Patterns("$temp")
+    global _temp, _temp_version
+
+    local = _ctx[_current.get()]
+    if local.name != "$global":
+        return local
+    if _temp.version != _temp_version:
+        _temp = Patterns("$temp")
+        _temp_version = _temp.version
+    return _temp
 
 
 def global_patterns():
     return _ctx["$global"]
 
 
+def patterns_version():
+    """当前 local 组名与 global, local 表达式组的版本; 任一组被修改或切换 local 组后都会改变"""
+    local = _ctx[_current.get()]
+    return local.name, _ctx["$global"].version, local.version
+
+
+def patterns_view():
+    """获取先查找 local 再查找 global 的只读视图"""
+    return _views[_current.get()]
+
+
 def all_patterns():
     """获取 global 与 local 的合并表达式组"""
-    new = Patterns("$temp")
-    new.update(global_patterns().data)
-    local = local_patterns()
-    if not local.name.startswith("$"):
-        new.update(local_patterns().data)
-    return new
+    return _views[_current.get()].merged()
 
 
 __all__ = [
@@ -125,7 +223,11 @@ __all__ = [
     "local_patterns",
     "global_patterns",
     "all_patterns",
+    "patterns_view",
+    "PatternsView",
+    "patterns_version",
     "switch_local_patterns",
     "create_local_patterns",
     "reset_local_patterns",
+    "using_local_patterns",
 ]
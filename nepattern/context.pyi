@@ -1,11 +1,13 @@
 from collections import UserDict
-from typing import Any, Iterable, final
+from contextlib import AbstractContextManager
+from typing import Any, Iterable, Iterator, Mapping, final
 
 from .core import Pattern
 
 @final
 class Patterns(UserDict[Any, Pattern]):
     name: str
+    version: int
     def __init__(self, name: str): ...
     def set(self, target: Pattern[Any], alias: str | None = None, cover: bool = True, no_alias=False):
         """
@@ -23,6 +25,25 @@ class Patterns(UserDict[Any, Pattern]):
     def merge(self, patterns: dict[str, Pattern[Any]], no_alias=False): ...
     def remove(self, origin_type: type, alias: str | None = None): ...
 
+@final
+class PatternsView(Mapping[Any, Pattern]):
+    """按顺序查找多个表达式组的只读视图, 不会复制其内容"""
+
+    layers: tuple[Patterns, ...]
+    name: str
+    def __init__(self, *layers: Patterns): ...
+    @property
+    def version(self) -> tuple[int, ...]:
+        """各表达式组的版本, 任一组被修改后都会改变"""
+        ...
+
+    def __getitem__(self, key: Any) -> Pattern: ...
+    def __iter__(self) -> Iterator[Any]: ...
+    def __len__(self) -> int: ...
+    def merged(self) -> Patterns:
+        """获取合并后的表达式组; 仅在某一组被修改后重新构建"""
+        ...
+
 def create_local_patterns(
     name: str,
     data: dict[Any, Pattern[Any]] | None = None,
@@ -40,7 +61,22 @@ def create_local_patterns(
 
 def switch_local_patterns(name: str) -> None: ...
 def reset_local_patterns() -> None: ...
+def using_local_patterns(name: str) -> AbstractContextManager[Patterns]:
+    """
+    在当前上下文中临时切换 local 表达式组, 退出时恢复
+
+    current 保存在 ContextVar 中, 不同线程与 asyncio 任务之间互不影响
+    """
+    ...
+
 def local_patterns() -> Patterns: ...
 def global_patterns() -> Patterns: ...
+def patterns_version() -> tuple[str, int, int]:
+    """当前 local 组名与 global, local 表达式组的版本; 任一组被修改或切换 local 组后都会改变"""
+
+def patterns_view() -> PatternsView:
+    """获取先查找 local 再查找 global 的只读视图"""
+    ...
+
 def all_patterns() -> Patterns:
     """获取 global 与 local 的合并表达式组"""
@@ -1,18 +1,283 @@
 from __future__ import annotations
 
+import asyncio
+from bisect import bisect_left
 from copy import deepcopy
+import copyreg
+from functools import partial, wraps
+import os
 import re
-from typing import Any, Callable, Generic, TypeVar, Union, overload
+from types import MethodType
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ClassVar,
+    Generic,
+    Iterable,
+    Iterator,
+    TypeVar,
+    Union,
+    final,
+    overload,
+)
 from typing_extensions import Self
+from weakref import ref
 
-from tarina import Empty, generic_isinstance
+from tarina import Empty, is_coroutinefunction
 from tarina.lang import lang
 
 from .exception import MatchFailed
-from .util import TPattern
+from .util import TPattern, _IsInstance, chunked, flatten_types, iter_source, type_checker, type_determined
+
+if TYPE_CHECKING:
+    from .trace import TraceEvent
 
 T = TypeVar("T")
 _T = TypeVar("_T")
+_TPat = TypeVar("_TPat", bound="Pattern")
+
+
+def _identity(_, input_):
+    return input_
+
+
+def _require_async(self, input_):
+    raise TypeError(lang.require("nepattern", "error.require_async").format(target=self))
+
+
+class _OriginValidator:
+    """默认的预验证函数, 检查输入是否为构造表达式时的 origin 类型"""
+
+    __slots__ = ("origin", "check")
+
+    def __init__(self, origin: Any):
+        self.origin = origin
+        self.check = type_checker(origin)
+
+    def __call__(self, input_) -> bool:
+        return self.check is None or self.check(input_)
+
+
+def _regex_match(self: _RegexPattern, x: str):
+    mat = re.match(self.pattern, x) or re.search(self.pattern, x)
+    if not mat:
+        return Unmatched("content", x, self.pattern)
+    return mat[0]
+
+
+def _regex_convert(fn: Callable[[re.Match[str]], Any], self: _RegexPattern, x: str):
+    mat = re.match(self.pattern, x) or re.search(self.pattern, x)
+    if not mat:
+        return Unmatched("content", x, self.pattern)
+    return fn(mat)
+
+
+def _regex_convert_origin(origin: type, fn: Callable[[re.Match[str]], Any], self: _RegexPattern, x):
+    if isinstance(x, origin):
+        return x
+    return _regex_convert(fn, self, x)
+
+
+_SLOTS: dict[type, tuple[str, ...]] = {}
+
+
+def _slots(cls: type) -> tuple[str, ...]:
+    """类及其基类声明的全部 __slots__"""
+    if (slots := _SLOTS.get(cls)) is None:
+        slots = _SLOTS[cls] = tuple(
+            slot for base in cls.__mro__ for slot in base.__dict__.get("__slots__", ()) if slot != "__dict__"
+        )
+    return slots
+
+
+def _from_match(match: Callable[[Any, Any], Any]) -> Callable[[Any, Any], Any]:
+    """由仅重写了 match 的子类 (或实例上替换的 match) 生成 try_match"""
+
+    def try_match(self, input_):
+        try:
+            return match(self, input_)
+        except MatchFailed as e:
+            return Unmatched(e.code or "content", input_ if e.target is None else e.target, e.expected, e)
+
+    try_match.__from_match__ = True  # type: ignore
+    return try_match
+
+
+def _call_match(match: Callable[[Any], Any], _, input_):
+    return match(input_)
+
+
+def _real_base(cls: type) -> type[Pattern]:
+    """最近的带有真正的 try_match (而非由 match 生成) 的类"""
+    return next(
+        base
+        for base in cls.__mro__
+        if "try_match" in base.__dict__
+        and not hasattr(_original(base.__dict__["try_match"]), "__from_match__")
+    )
+
+
+def _custom_match(cls: type) -> bool:
+    """类是否重写了匹配函数, 但没有相应地重写 _input_types"""
+    for base in cls.__mro__:
+        if base is Pattern or "_input_types" in base.__dict__:
+            return False
+        if "try_match" in base.__dict__ or "match" in base.__dict__:
+            return True
+    return False
+
+
+_BUILTINS: dict[int, str] = {}
+"""内置表达式的 id 到其在 nepattern.base 中名称的映射, 用于按名称序列化"""
+
+
+def _load_builtin(name: str) -> Pattern:
+    from . import base
+
+    return getattr(base, name)
+
+
+def _rebuild(func: Callable[..., Pattern], args: tuple, kwargs: dict, alias: str | None) -> Pattern:
+    pat = func(*args, **kwargs)
+    pat.alias = alias
+    return pat
+
+
+_hooks: tuple[Callable[[Callable, Pattern, Any], Any], ...] = ()
+"""匹配函数的观察钩子 hook(func, self, input_), 由 nepattern.stats 与 nepattern.trace 安装
+
+仅在存在钩子时匹配函数才会被包装, 因此未安装钩子时不产生任何开销; 后安装的钩子更靠近原本的匹配函数
+"""
+
+_instance_matchers: dict[int, ref[Pattern]] = {}
+"""带有实例级匹配函数的表达式, 安装钩子时需要逐个包装
+
+按 id 记录而不是放入 WeakSet: 表达式的哈希与相等基于值, 且会在设置匹配函数后 (如修改 alias) 改变
+"""
+
+
+def _track(pat: Pattern):
+    """记录带有实例级匹配函数的表达式, 表达式被回收时自动移除"""
+    if (key := id(pat)) in _instance_matchers:
+        return
+
+    def _remove(wr):
+        if _instance_matchers.get(key) is wr:
+            del _instance_matchers[key]
+
+    _instance_matchers[key] = ref(pat, _remove)
+
+
+def _observe(func: Callable[[Any, Any], Any]) -> Callable[[Any, Any], Any]:
+    @wraps(func)
+    def try_match(self, input_):
+        call = func
+        for hook in reversed(_hooks):
+            call = partial(hook, call)
+        return call(self, input_)
+
+    try_match.__observed__ = func  # type: ignore
+    return try_match
+
+
+def _original(func: Callable) -> Callable:
+    """去除钩子的包装, 得到原本的匹配函数"""
+    return getattr(func, "__observed__", func)
+
+
+def _set_try_match(pat: Pattern, func: Callable[[Any, Any], Any]):
+    """为表达式设置实例级的匹配函数, 原有的流水线不再适用"""
+    pat.__dict__.pop("_pipeline", None)
+    pat.try_match = MethodType(_observe(func) if _hooks else func, pat)  # type: ignore
+    _track(pat)
+
+
+def _subclasses(cls: type) -> Iterator[type]:
+    yield cls
+    for sub in cls.__subclasses__():
+        yield from _subclasses(sub)
+
+
+def _wrap_all(enabled: bool):
+    """包装或还原全部表达式类与带有实例级匹配函数的表达式的 try_match"""
+    for cls in _subclasses(Pattern):
+        func = cls.__dict__.get("try_match")
+        if func is not None and hasattr(func, "__observed__") is not enabled:
+            cls.try_match = _observe(func) if enabled else func.__observed__
+    for wr in list(_instance_matchers.values()):
+        if (pat := wr()) is None:
+            continue
+        if (method := pat.__dict__.get("try_match")) is None or method.__class__ is not MethodType:
+            continue
+        if hasattr(method.__func__, "__observed__") is not enabled:
+            func = _observe(method.__func__) if enabled else method.__func__.__observed__
+            pat.try_match = MethodType(func, pat)
+
+
+def _install_hook(hook: Callable[[Callable, Pattern, Any], Any]):
+    global _hooks
+    if hook in _hooks:
+        return
+    _hooks = (*_hooks, hook)
+    if len(_hooks) == 1:
+        _wrap_all(True)
+
+
+def _uninstall_hook(hook: Callable[[Callable, Pattern, Any], Any]):
+    global _hooks
+    if hook not in _hooks:
+        return
+    _hooks = tuple(i for i in _hooks if i is not hook)
+    if not _hooks:
+        _wrap_all(False)
+
+
+def _rebuildable(func: Callable[..., _TPat]) -> Callable[..., _TPat]:
+    """记录派生表达式的构造方式, 使其能以重新构造的方式被序列化"""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if (res := func(*args, **kwargs)) is not args[0]:
+            res._recipe = (wrapper, args, kwargs)
+        return res
+
+    wrapper.__rebuildable__ = True  # type: ignore
+    return wrapper
+
+
+@final
+class Unmatched:
+    """匹配失败的结果, 仅在需要时才会构造对应的 MatchFailed
+
+    stage 为 Pattern.compile 构建的匹配函数中失败的阶段 (pre_validate, convert 或 post_validate)
+    """
+
+    __slots__ = ("code", "target", "expected", "cause", "stage")
+
+    def __init__(
+        self,
+        code: str,
+        target: Any,
+        expected: Any,
+        cause: MatchFailed | None = None,
+        stage: str | None = None,
+    ):
+        self.code = code
+        self.target = target
+        self.expected = expected
+        self.cause = cause
+        self.stage = stage
+
+    def error(self) -> MatchFailed:
+        """构造对应的 MatchFailed, 错误信息会在 str() 时才生成; 由 MatchFailed 转换而来时返回原本的异常"""
+        if self.cause is not None:
+            return self.cause
+        return MatchFailed(code=self.code, target=self.target, expected=self.expected)
+
+    def __repr__(self):
+        return f"Unmatched({self.code!r}, target={self.target!r}, expected={self.expected!r})"
 
 
 class ValidateResult(Generic[T]):
@@ -21,12 +286,12 @@ class ValidateResult(Generic[T]):
     def __init__(
         self,
         value: T | type[Empty] = Empty,
-        error: Exception | type[Empty] = Empty,
+        error: Exception | Unmatched | type[Empty] = Empty,
     ):
         self._value = value
         self._error = error
 
-    __slots__ = ("_value", "_error")
+    __slots__ = ("_value", "_error", "_trace")
 
     def value(self) -> T:
         """获取验证结果"""
@@ -36,10 +301,17 @@ class ValidateResult(Generic[T]):
 
     def error(self) -> Exception | None:
         """获取验证错误"""
+        if self._error.__class__ is Unmatched:
+            self._error = self._error.error()  # type: ignore
         if self._error is not Empty:
             assert isinstance(self._error, Exception)
             return self._error
 
+    @property
+    def trace(self) -> TraceEvent | None:
+        """以 execute(trace=True) 验证时记录的求值事件树"""
+        return getattr(self, "_trace", None)
+
     @property
     def success(self) -> bool:
         """是否验证成功"""
@@ -61,21 +333,82 @@ class ValidateResult(Generic[T]):
         )
 
 
+class BatchResult(Generic[T]):
+    """批量验证结果
+
+    values 与输入一一对应, 失败项的位置为 None; failures 为失败项的下标, 其错误仅在访问时构造
+
+    流式验证时 offset 为本块首项在整个输入中的位置
+    """
+
+    __slots__ = ("values", "failures", "_errors", "offset")
+
+    def __init__(
+        self,
+        values: list[T | None],
+        failures: list[int],
+        errors: list[Exception | Unmatched],
+        offset: int = 0,
+    ):
+        self.values = values
+        self.failures = failures
+        self._errors = errors
+        self.offset = offset
+
+    @property
+    def success(self) -> bool:
+        """是否全部验证成功"""
+        return not self.failures
+
+    @property
+    def failed(self) -> bool:
+        """是否存在验证失败的项"""
+        return bool(self.failures)
+
+    def error(self, index: int) -> Exception | None:
+        """获取指定下标的验证错误"""
+        if (i := bisect_left(self.failures, index)) == len(self.failures) or self.failures[i] != index:
+            return None
+        if (err := self._errors[i]).__class__ is Unmatched:
+            err = self._errors[i] = err.error()  # type: ignore
+        return err  # type: ignore
+
+    def errors(self) -> dict[int, Exception]:
+        """获取所有的验证错误, 以下标为键"""
+        for i, err in enumerate(self._errors):
+            if err.__class__ is Unmatched:
+                self._errors[i] = err.error()  # type: ignore
+        return dict(zip(self.failures, self._errors))  # type: ignore
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        if self.offset:
+            return f"BatchResult(offset={self.offset}, total={len(self.values)}, failures={self.failures!r})"
+        return f"BatchResult(total={len(self.values)}, failures={self.failures!r})"
+
+
+_INLINE_CACHE_SIZE = 4
+"""内联缓存记录的输入类型数量上限, 超出后 (多态过高) 不再记录新的类型"""
+
+
 class Pattern(Generic[T]):
+    _recipe: tuple[Callable[..., Pattern], tuple, dict] | None = None
+    _adaptive: bool | None = None
+    _adaptive_stats: list[int] | None = None
+
+    _match_base: ClassVar[type[Pattern] | None] = None
+    """仅重写了 match 的子类中, 由 Pattern.match 使用其 try_match 的基类"""
+    adaptive_default: ClassVar[bool] = False
+    """未单独设置时是否启用自适应缓存, 仅对此后编译的表达式生效"""
+
     @staticmethod
     def regex_match(pattern: str | TPattern, alias: str | None = None) -> _RegexPattern[str]:
         """构建一个仅正则表达式匹配的 Pattern，不进行转换"""
         pat = _RegexPattern(pattern, str, alias or str(pattern))
 
-        @pat.convert
-        def _(self: _RegexPattern, x: str):
-            mat = re.match(self.pattern, x) or re.search(self.pattern, x)
-            if not mat:
-                raise MatchFailed(
-                    lang.require("nepattern", "error.content").format(target=x, expected=self.pattern)
-                )
-            return mat[0]
-
+        pat.convert(_regex_match)
         return pat
 
     @staticmethod
@@ -89,31 +422,9 @@ class Pattern(Generic[T]):
         """构建一个正则表达式匹配的 Pattern，并提供转换函数"""
         pat = _RegexPattern(pattern, origin, alias or str(pattern))
         if allow_origin:
-            pat.accept(Union[str, origin])
-
-            @pat.convert
-            def _(self: _RegexPattern, x):
-                if isinstance(x, origin):
-                    return x
-                mat = re.match(self.pattern, x) or re.search(self.pattern, x)
-                if not mat:
-                    raise MatchFailed(
-                        lang.require("nepattern", "error.content").format(target=x, expected=self.pattern)
-                    )
-                return fn(mat)
-
+            pat.accept(Union[str, origin]).convert(partial(_regex_convert_origin, origin, fn))
         else:
-            pat.accept(str)
-
-            @pat.convert
-            def _(self: _RegexPattern, x: str):
-                mat = re.match(self.pattern, x) or re.search(self.pattern, x)
-                if not mat:
-                    raise MatchFailed(
-                        lang.require("nepattern", "error.content").format(target=x, expected=self.pattern)
-                    )
-                return fn(mat)
-
+            pat.accept(str).convert(partial(_regex_convert, fn))
         return pat
 
     @staticmethod
@@ -135,12 +446,27 @@ class Pattern(Generic[T]):
 
         self._accepts = Any
         self._post_validator = None
-        self._pre_validator = (lambda x: generic_isinstance(x, self.origin)) if origin else None
+        self._pre_validator = _OriginValidator(origin) if origin else None
         self._converter = None
         self._pre_validate_modified = False
+        self._compiled: Callable[[Pattern[T], Any], T] | None = None
+        self._compiled_async: Callable[[Pattern[T], Any], Any] | None = None
 
     def __init_subclass__(cls, **kwargs):
         cls.__hash__ = Pattern.__hash__
+        if "match" in cls.__dict__ and "try_match" not in cls.__dict__:
+            # 兼容仅重写了 match 的子类; 其中调用的 super().match 不能再经由 try_match 回到该子类的 match
+            cls.try_match = _from_match(cls.__dict__["match"])
+            cls._match_base = _real_base(cls)
+        if _hooks and "try_match" in cls.__dict__:
+            cls.try_match = _observe(cls.__dict__["try_match"])
+
+    def __setattr__(self, name: str, value: Any):
+        if name == "match":
+            # 兼容在实例上直接替换 match 的写法: 由其生成实例级的 try_match, 原本的 match 则直接使用类的匹配函数
+            _set_try_match(self, _from_match(partial(_call_match, value)))
+            object.__setattr__(self, "_match_base", _real_base(self.__class__))
+        object.__setattr__(self, name, value)
 
     def accept(self, input_type: Any):
         """设置接受的输入类型"""
@@ -149,52 +475,370 @@ class Pattern(Generic[T]):
         self._accepts = input_type
         if not self._pre_validate_modified:
             self._pre_validator = None
+        self._compiled = None
+        self._recipe = None
         return self
 
     def pre_validate(self, func: Callable[[Any], bool]):
         """设置预验证函数 (经过 accept 后，convert 前)"""
         self._pre_validator = func
         self._pre_validate_modified = True
+        self._compiled = None
+        self._recipe = None
         return self
 
     def post_validate(self, func: Callable[[T], bool]):
         """设置后验证函数 (convert 后，仅当设置了 converter 才会生效)"""
         self._post_validator = func
+        self._compiled = None
+        self._recipe = None
         return self
 
-    def convert(self, func: Callable[[Self, Any], T | None]):
-        """设置转换函数, 返回 None 时表示转换失败"""
+    def convert(self, func: Callable[[Self, Any], T | Unmatched | None]):
+        """设置转换函数, 返回 None 或 Unmatched 时表示转换失败"""
         self._converter = func
+        self._compiled = None
+        self._recipe = None
+        return self
+
+    def compile(self) -> Self:
+        """根据当前设置的各阶段构建专用的匹配函数, 未设置的阶段不会参与匹配
+
+        在 accept, pre_validate, convert 与 post_validate 被再次调用后失效, 并在下次匹配时重新构建
+        """
+        accepts = self._accepts
+        pre_validator = self._pre_validator
+        converter = self._converter
+        post_validator = self._post_validator
+        origin = self.origin
+        func = None
+
+        if any(is_coroutinefunction(i) for i in (pre_validator, converter, post_validator) if i):
+            self._compiled = _require_async
+            self._compiled_async = self._build_async()
+            return self
+        self._compiled_async = None
+
+        if converter and post_validator:
+
+            def func(self, input_):
+                if (res := converter(self, input_)) is None:
+                    return Unmatched("content", input_, origin, stage="convert")
+                if res.__class__ is Unmatched:
+                    return res
+                if not post_validator(res):
+                    return Unmatched("content", res, origin, stage="post_validate")
+                return res
+
+        elif converter:
+
+            def func(self, input_):
+                if (res := converter(self, input_)) is None:
+                    return Unmatched("content", input_, origin, stage="convert")
+                return res
+
+        if pre_validator:
+            _convert = func
+
+            def func(self, input_):
+                if not pre_validator(input_):
+                    return Unmatched("content", input_, origin, stage="pre_validate")
+                return _convert(self, input_) if _convert else input_
+
+        adaptive = self.adaptive_default if self._adaptive is None else self._adaptive
+        self._adaptive_stats = None
+        if (check := type_checker(accepts)) is not None and adaptive and type_determined(check):
+            _validate = func
+            stats = self._adaptive_stats = [0, 0]
+            seen: set[type] = set()
+
+            def func(self, input_):
+                if input_.__class__ in seen:
+                    stats[0] += 1
+                    return _validate(self, input_) if _validate else input_
+                stats[1] += 1
+                if not check(input_):
+                    return Unmatched("type", input_, accepts)
+                if len(seen) < _INLINE_CACHE_SIZE:
+                    seen.add(input_.__class__)
+                return _validate(self, input_) if _validate else input_
+
+        elif check.__class__ is _IsInstance:
+            _validate = func
+            types = check.types  # type: ignore
+
+            def func(self, input_):
+                if not isinstance(input_, types):
+                    return Unmatched("type", input_, accepts)
+                return _validate(self, input_) if _validate else input_
+
+        elif check is not None:
+            _validate = func
+
+            def func(self, input_):
+                if not check(input_):
+                    return Unmatched("type", input_, accepts)
+                return _validate(self, input_) if _validate else input_
+
+        self._compiled = func or _identity
         return self
 
+    def _build_async(self):
+        """构建包含异步阶段时的匹配函数, 仅对异步的阶段进行 await"""
+        accepts = self._accepts
+        pre_validator = self._pre_validator
+        converter = self._converter
+        post_validator = self._post_validator
+        origin = self.origin
+        pre_async = is_coroutinefunction(pre_validator)
+        convert_async = is_coroutinefunction(converter)
+        post_async = is_coroutinefunction(post_validator)
+        check = type_checker(accepts)
+
+        async def func(self, input_):
+            if check is not None and not check(input_):
+                return Unmatched("type", input_, accepts)
+            if pre_validator:
+                ok = pre_validator(input_)
+                if not (await ok if pre_async else ok):
+                    return Unmatched("content", input_, origin, stage="pre_validate")
+            if not converter:
+                return input_
+            res = converter(self, input_)
+            if (res := await res if convert_async else res) is None:
+                return Unmatched("content", input_, origin, stage="convert")
+            if res.__class__ is Unmatched:
+                return res
+            if post_validator:
+                ok = post_validator(res)
+                if not (await ok if post_async else ok):
+                    return Unmatched("content", res, origin, stage="post_validate")
+            return res
+
+        return func
+
+    def adaptive(self, enabled: bool | None = True) -> Self:
+        """设置是否启用自适应缓存, 为 None 时跟随 Pattern.adaptive_default
+
+        启用后记录通过 accept 检查的输入类型, 同类型的输入直接跳过检查; 仅对结果只取决于类型的 accept 生效
+        """
+        self._adaptive = enabled
+        self._compiled = None
+        return self
+
+    def adaptive_info(self) -> tuple[int, int] | None:
+        """自适应缓存的命中与未命中次数, 未启用时为 None"""
+        if not self._compiled:
+            self.compile()
+        return None if self._adaptive_stats is None else (self._adaptive_stats[0], self._adaptive_stats[1])
+
+    @property
+    def is_async(self) -> bool:
+        """是否包含异步的验证或转换阶段"""
+        if not self._compiled:
+            self.compile()
+        return self._compiled_async is not None
+
+    def try_match(self, input_: Any) -> T | Unmatched:
+        """执行匹配, 失败时返回 Unmatched 而不是抛出异常"""
+        if not (func := self._compiled):
+            func = self.compile()._compiled
+        return func(self, input_)  # type: ignore
+
     def match(self, input_: Any) -> T:
-        if not generic_isinstance(input_, self._accepts):
-            raise MatchFailed(
-                lang.require("nepattern", "error.type").format(target=input_, expected=self._accepts)
-            )
-        if self._pre_validator and not self._pre_validator(input_):
-            raise MatchFailed(
-                lang.require("nepattern", "error.content").format(target=input_, expected=self.origin)
-            )
-        if self._converter:
-            input_ = self._converter(self, input_)
-            if input_ is None:
-                raise MatchFailed(
-                    lang.require("nepattern", "error.content").format(target=input_, expected=self.origin)
-                )
-            if self._post_validator and not self._post_validator(input_):
-                raise MatchFailed(
-                    lang.require("nepattern", "error.content").format(target=input_, expected=self.origin)
-                )
-        return input_
-
-    def execute(self, input_: Any) -> ValidateResult[T]:
-        """执行验证"""
+        """执行匹配, 失败时抛出 MatchFailed"""
+        if (base := self._match_base) is not None:
+            res = base.try_match(self, input_)
+        else:
+            res = self.try_match(input_)
+        if res.__class__ is Unmatched:
+            raise res.error()  # type: ignore
+        return res  # type: ignore
+
+    def _input_types(self) -> tuple[type, ...] | None:
+        """可能通过匹配的输入类型, 无法确定时返回 None
+
+        仅由 accept 或构造时的 origin 检查推断; origin 是输出类型, 不能作为输入类型的依据
+        """
+        if _custom_match(self.__class__) or "match" in self.__dict__:
+            return None
+        if self._accepts is not Any:
+            return flatten_types(self._accepts)
+        if (pre := self._pre_validator).__class__ is _OriginValidator:
+            return flatten_types(pre.origin)  # type: ignore
+
+    def execute(self, input_: Any, trace: bool = False) -> ValidateResult[T]:
+        """执行验证
+
+        Args:
+            input_: 输入值
+            trace: 是否记录求值事件树, 记录结果可通过 ValidateResult.trace 获取
+        """
+        if trace:
+            from .trace import trace as _trace
+
+            with _trace() as root:
+                res = self.execute(input_)
+            res._trace = root.children[0] if len(root.children) == 1 else root
+            return res
+        try:
+            if (res := self.try_match(input_)).__class__ is Unmatched:
+                return ValidateResult(error=res)  # type: ignore
+            return ValidateResult(res)  # type: ignore
+        except Exception as e:
+            return ValidateResult(error=e)
+
+    async def try_match_async(self, input_: Any) -> T | Unmatched:
+        """异步执行匹配, 会 await 异步的验证与转换阶段; 不含异步阶段时等同于 try_match"""
+        if not self._compiled:
+            self.compile()
+        if (func := self._compiled_async) is None:
+            return self.try_match(input_)
+        return await func(self, input_)
+
+    async def match_async(self, input_: Any) -> T:
+        """异步执行匹配, 失败时抛出 MatchFailed"""
+        if (res := await self.try_match_async(input_)).__class__ is Unmatched:
+            raise res.error()  # type: ignore
+        return res  # type: ignore
+
+    async def execute_async(self, input_: Any) -> ValidateResult[T]:
+        """异步执行验证"""
         try:
-            return ValidateResult(self.match(input_))
+            if (res := await self.try_match_async(input_)).__class__ is Unmatched:
+                return ValidateResult(error=res)  # type: ignore
+            return ValidateResult(res)  # type: ignore
         except Exception as e:
             return ValidateResult(error=e)
 
+    async def execute_many_async(self, inputs: Iterable[Any], concurrency: int = 16) -> BatchResult[T]:
+        """
+        异步批量执行验证
+
+        Args:
+            inputs: 输入序列
+            concurrency: 同时进行的验证数量上限; 不含异步阶段时直接同步执行
+        """
+        if not self.is_async:
+            return self.execute_many(inputs)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _run(input_):
+            async with semaphore:
+                try:
+                    return await self.try_match_async(input_)
+                except Exception as e:
+                    return e
+
+        results = await asyncio.gather(*map(_run, inputs))
+        values = []
+        failures = []
+        errors = []
+        for index, res in enumerate(results):
+            if res.__class__ is Unmatched or isinstance(res, Exception):
+                values.append(None)
+                failures.append(index)
+                errors.append(res)
+            else:
+                values.append(res)
+        return BatchResult(values, failures, errors)
+
+    def execute_many(self, inputs: Iterable[Any], workers: int | None = None) -> BatchResult[T]:
+        """
+        批量执行验证
+
+        Args:
+            inputs: 输入序列
+            workers: 大于 0 时在该数量的工作进程中分块并行验证, 要求表达式可被 pickle 序列化
+        """
+        if workers:
+            from .parallel import iter_parallel
+
+            merged = BatchResult([], [], [])
+            for res in iter_parallel(self, inputs, workers):
+                merged.values.extend(res.values)
+                merged.failures.extend(i + res.offset for i in res.failures)
+                merged._errors.extend(res._errors)
+            return merged
+        return self._execute_batch(inputs)
+
+    def _execute_batch(
+        self, inputs: Iterable[Any], fast: Callable[[Any], Any] | None = None
+    ) -> BatchResult[T]:
+        """逐个验证; fast 为快速路径的转换函数, 返回 Empty 时表示不适用, 回退到 try_match"""
+        values = []
+        failures = []
+        errors = []
+        try_match = self.try_match
+        if _hooks:
+            fast = None  # 快速路径不经过 try_match, 安装钩子 (如统计) 时每一项都需要被记录
+        for index, input_ in enumerate(inputs):
+            if fast is not None and (res := fast(input_)) is not Empty:
+                values.append(res)
+                continue
+            try:
+                if (res := try_match(input_)).__class__ is not Unmatched:
+                    values.append(res)
+                    continue
+            except Exception as e:
+                res = e
+            values.append(None)
+            failures.append(index)
+            errors.append(res)
+        return BatchResult(values, failures, errors)
+
+    def match_many(self, inputs: Iterable[Any]) -> list[T]:
+        """批量执行匹配, 任一项失败时抛出对应的异常"""
+        res = self.execute_many(inputs)
+        if res.failures:
+            raise res.error(res.failures[0])  # type: ignore
+        return res.values  # type: ignore
+
+    def iter_execute(
+        self,
+        source: str | os.PathLike | IO | Iterable[Any],
+        chunk_size: int = 4096,
+        encoding: str = "utf-8",
+        workers: int | None = None,
+    ) -> Iterator[BatchResult[T]]:
+        """
+        流式批量验证, 每次仅持有一块输入
+
+        Args:
+            source: 文件路径, 文件对象或任意可迭代对象; 文件按行读取并去除换行符
+            chunk_size: 每块的输入数量
+            encoding: 以路径打开文件时使用的编码
+            workers: 大于 0 时在该数量的工作进程中并行验证, 结果仍按输入顺序产出
+        """
+        if workers:
+            from .parallel import iter_parallel
+
+            yield from iter_parallel(self, iter_source(source, encoding), workers, chunk_size)
+            return
+        offset = 0
+        for chunk in chunked(iter_source(source, encoding), chunk_size):
+            res = self.execute_many(chunk)
+            res.offset = offset
+            offset += len(chunk)
+            yield res
+
+    def iter_match(
+        self,
+        source: str | os.PathLike | IO | Iterable[Any],
+        chunk_size: int = 4096,
+        encoding: str = "utf-8",
+        workers: int | None = None,
+    ) -> Iterator[T]:
+        """流式批量匹配, 仅产出匹配成功的结果, 跳过失败项"""
+        for res in self.iter_execute(source, chunk_size, encoding, workers):
+            if not res.failures:
+                yield from res.values  # type: ignore
+                continue
+            failures = set(res.failures)
+            for index, value in enumerate(res.values):
+                if index not in failures:
+                    yield value  # type: ignore
+
     def __str__(self):
         if self.alias:
             return self.alias
@@ -206,7 +850,73 @@ class Pattern(Generic[T]):
         return f"{self.__class__.__name__}({self.origin}, {self.alias!r})"
 
     def copy(self) -> Self:
-        return deepcopy(self)
+        """结构化复制, 新表达式与原表达式共享各成员, 仅复制属性表本身
+
+        绑定在原表达式上的实例方法 (如 func 与 combine 设置的 try_match) 会重新绑定到新表达式;
+        复制后的表达式可能被就地修改 (如 prefixed), 因此不保留构造方式与流水线, 由 _rebuildable 与 _pipe 在其结果上重新记录
+        """
+        new = self.__class__.__new__(self.__class__)
+        state = self.__dict__.copy()
+        state.pop("_recipe", None)
+        state.pop("_pipeline", None)
+        for key, value in state.items():
+            if value.__class__ is MethodType and value.__self__ is self:
+                state[key] = MethodType(value.__func__, new)
+        new.__dict__.update(state)
+        if "try_match" in state:
+            _track(new)
+        for slot in _slots(self.__class__):
+            if hasattr(self, slot):
+                object.__setattr__(new, slot, getattr(self, slot))
+        return new
+
+    def to_spec(self) -> dict[str, Any]:
+        """转为可 JSON 序列化的声明式描述, 参见 nepattern.spec"""
+        from .spec import to_spec
+
+        return to_spec(self)
+
+    @staticmethod
+    def from_spec(spec: dict[str, Any]) -> Pattern:
+        """从 to_spec 的结果构建表达式"""
+        from .spec import from_spec
+
+        return from_spec(spec)
+
+    def fingerprint(self) -> str:
+        """表达式结构的稳定指纹, 可作为跨进程的缓存键"""
+        from .spec import fingerprint
+
+        return fingerprint(self)
+
+    def _state(self) -> dict[str, Any]:
+        """实例的全部属性 (包括 __slots__), 不含编译产物"""
+        state = dict(self.__dict__)
+        for slot in _slots(self.__class__):
+            if slot not in state and hasattr(self, slot):
+                state[slot] = getattr(self, slot)
+        state["_compiled"] = state["_compiled_async"] = None
+        return state
+
+    def __setstate__(self, state: dict[str, Any]):
+        for key, value in state.items():
+            object.__setattr__(self, key, value)
+
+    def __reduce_ex__(self, protocol):
+        if _BUILTINS.get(id(self)) is not None:
+            return _load_builtin, (_BUILTINS[id(self)],)
+        if self._recipe is not None:
+            return _rebuild, (*self._recipe, self.alias)
+        return copyreg.__newobj__, (self.__class__,), self._state()
+
+    def __deepcopy__(self, memo):
+        new = self.__class__.__new__(self.__class__)
+        memo[id(self)] = new
+        # 各阶段的函数与原表达式共享, 与函数对象本身不会被深拷贝的行为保持一致
+        for func in (self._pre_validator, self._converter, self._post_validator):
+            memo.setdefault(id(func), func)
+        new.__setstate__(deepcopy(self._state(), memo))
+        return new
 
     def __lshift__(self, other):  # pragma: no cover
         return self.execute(other)
@@ -1,2 +1,27 @@
+from __future__ import annotations
+
+from typing import Any
+
+from tarina.lang import lang
+
+
 class MatchFailed(Exception):
     """pattern match failed"""
+
+    def __init__(self, *args, code: str | None = None, target: Any = None, expected: Any = None):
+        super().__init__(*args)
+        self.code = code
+        self.target = target
+        self.expected = expected
+
+    def __str__(self):
+        if self.args or self.code is None:
+            return super().__str__()
+        return lang.require("nepattern", f"error.{self.code}").format(
+            type=self.target.__class__, target=self.target, expected=self.expected
+        )
+
+    def __repr__(self):
+        if self.args or self.code is None:
+            return super().__repr__()
+        return f"MatchFailed(code={self.code!r}, target={self.target!r}, expected={self.expected!r})"
@@ -1,30 +1,199 @@
 from __future__ import annotations
 
 from functools import reduce
+from itertools import islice
+from types import MethodType
 from typing import Any, Callable, Protocol, TypeVar, overload
 
-from .core import Pattern
+from .core import Pattern, Unmatched, _original, _rebuildable, _set_try_match
+from .vector import X as X
+from .vector import segment_length, vector_segment
 
 T = TypeVar("T")
 T1 = TypeVar("T1")
 
+_LAZY = {"map", "filter"}
+"""逐元素的步骤, 会被惰性地串联为一次遍历"""
 
+
+def _index(index: int, lazy: bool) -> Callable[[Any], Any]:
+    if not lazy:
+        return lambda res: res[index]
+    if index < 0:
+        return lambda res: list(res)[index]
+
+    def step(res):
+        for item in islice(res, index, None):
+            return item
+        raise IndexError("list index out of range")
+
+    return step
+
+
+def _slice(start: int | None, end: int | None, step: int, lazy: bool) -> Callable[[Any], Any]:
+    if not lazy:
+        return lambda res: res[start:end:step]
+    if (start or 0) >= 0 and (end is None or end >= 0) and step > 0:
+        return lambda res: islice(res, start, end, step)
+    return lambda res: iter(list(res)[start:end:step])
+
+
+def _reduce(func: Callable, initializer: Any) -> Callable[[Any], Any]:
+    if initializer is None:
+        return lambda res: reduce(func, res)
+    return lambda res: reduce(func, res, initializer)
+
+
+def _getitem(key: Any, default: Any) -> Callable[[Any], Any]:
+    def step(res):
+        try:
+            return res[key]
+        except Exception as e:  # pragma: no cover
+            if default is not None:
+                return default
+            raise e
+
+    return step
+
+
+def _build(ops: tuple[tuple, ...], lazy: bool) -> tuple[list[Callable[[Any], Any]], bool]:
+    """逐元素地执行各步骤的函数序列, 以及执行后的结果是否为惰性迭代器"""
+    funcs: list[Callable[[Any], Any]] = []
+    for kind, *args in ops:
+        if kind == "map":
+            func = args[0]
+            funcs.append(lambda res, func=func: map(func, res))
+        elif kind == "filter":
+            func = args[0]
+            funcs.append(lambda res, func=func: filter(func, res))
+        elif kind == "slice":
+            funcs.append(_slice(*args, lazy))
+            continue
+        elif kind == "index":
+            funcs.append(_index(args[0], lazy))
+        elif kind == "sum":
+            funcs.append(sum)
+        elif kind == "reduce":
+            funcs.append(_reduce(*args))
+        elif kind == "join":
+            funcs.append(args[0].join)
+        else:
+            if lazy:
+                funcs.append(list)
+            if kind == "upper":
+                funcs.append(lambda res: res.upper())
+            elif kind == "lower":
+                funcs.append(lambda res: res.lower())
+            elif kind == "getattr":
+                funcs.append(lambda res, key=args[0], default=args[1]: getattr(res, key, default))
+            elif kind == "getitem":
+                funcs.append(_getitem(*args))
+            else:
+                func, f_args, f_kwargs = args
+                funcs.append(
+                    lambda res, func=func, f_args=f_args, f_kwargs=f_kwargs: func(res, *f_args, **f_kwargs)
+                )
+        lazy = kind in _LAZY
+    return funcs, lazy
+
+
+def _chain(funcs: list[Callable[[Any], Any]]) -> Callable[[Any], Any]:
+    if len(funcs) == 1:
+        return funcs[0]
+
+    def run(res):
+        for func in funcs:
+            res = func(res)
+        return res
+
+    return run
+
+
+def _compile(ops: tuple[tuple, ...]) -> Callable[[Any], Any]:
+    """将步骤序列编译为单个函数
+
+    相邻的 map 与 filter 串联为惰性迭代器, 只遍历一次且不产生中间列表;
+    Index 与 Slice 在惰性输入上只计算所需范围内的元素, 其余步骤在需要时才将迭代器转为列表;
+    函数为 X 表达式或 ufunc 的 map/filter 及其后的 sum/reduce 在数值输入上交由 NumPy 整体执行
+    """
+    funcs: list[Callable[[Any], Any]] = []
+    lazy = False
+    index = 0
+    while index < len(ops):
+        if size := segment_length(ops, index):
+            segment = ops[index : index + size]
+            fallback, after = _build(segment, lazy)
+            funcs.append(vector_segment(segment, _chain(fallback)))
+            # 向量化时产出列表, 回退时可能产出迭代器, 两者都按惰性结果处理
+            lazy = after
+            index += size
+            continue
+        built, lazy = _build(ops[index : index + 1], lazy)
+        funcs.extend(built)
+        index += 1
+    if lazy:
+        funcs.append(list)
+    return _chain(funcs)
+
+
+def _pipeline(pat: Pattern) -> tuple[Callable, Callable, tuple[tuple, ...], Callable] | None:
+    """表达式上由 _pipe 设置的流水线, 仅当其匹配函数仍为 _pipe 设置的函数时有效"""
+    if (pipeline := pat.__dict__.get("_pipeline")) is None:
+        return None
+    if (func := pat.__dict__.get("try_match")) is None:
+        return None
+    return pipeline if _original(getattr(func, "__func__", func)) is pipeline[3] else None
+
+
+def _pipe(pat: Pattern, *op: Any) -> Pattern:
+    """复制表达式, 并在其匹配成功后追加一步处理
+
+    连续追加的步骤共享同一个源匹配函数, 并被编译为一条流水线, 而不是层层嵌套的匹配函数
+    """
+    _new = pat.copy()
+    if (pipeline := _pipeline(pat)) is None:
+        source = _new.try_match
+        source_async = _new.try_match_async
+        # 以未绑定的形式保存源匹配函数, 使复制后的表达式在自身上执行
+        source = _original(source.__func__) if isinstance(source, MethodType) else source
+        source_async = source_async.__func__ if isinstance(source_async, MethodType) else source_async
+        ops = (op,)
+    else:
+        source, source_async, ops, _ = pipeline
+        ops = (*ops, op)
+    run = _compile(ops)
+
+    def try_match(self, input_):
+        if (res := source(self, input_)).__class__ is Unmatched:
+            return res
+        return run(res)
+
+    async def try_match_async(self, input_):
+        if not self.is_async:
+            # 默认的 try_match_async 会回到实例上已追加步骤的 try_match, 使步骤被执行两次
+            return try_match(self, input_)
+        if (res := await source_async(self, input_)).__class__ is Unmatched:
+            return res
+        return run(res)
+
+    _set_try_match(_new, try_match)
+    _new.try_match_async = try_match_async.__get__(_new)
+    _new._pipeline = (source, source_async, ops, try_match)
+    return _new
+
+
+@_rebuildable
 def Index(
     pat: Pattern[list[T]],
     index: int,
 ) -> Pattern[T]:
-    _new = pat.copy()
-    _match = _new.match
-
-    def match(self, input_):
-        return _match(input_)[index]
-
-    _new.match = match.__get__(_new)
+    _new = _pipe(pat, "index", index)
     _new.alias = f"{_new}[{index}]"
     
     return _new  # type: ignore
 
 
+@_rebuildable
 def Slice(
     pat: Pattern[list[T]],
     start: int | None = None,
@@ -33,13 +202,7 @@ def Slice(
 ) -> Pattern[list[T]]:
     if start is None and end is None:
         return pat
-    _new = pat.copy()
-    _match = _new.match
-
-    def match(self, input_):
-        return _match(input_)[start:end:step]
-
-    _new.match = match.__get__(_new)
+    _new = _pipe(pat, "slice", start, end, step)
     if start is not None and end is not None:
         _slice = f"{start}:{end}"
     elif start is not None:
@@ -53,35 +216,25 @@ def Slice(
     return _new
 
 
+@_rebuildable
 def Map(
     pat: Pattern[list[T]],
     func: Callable[[T], T1],
     funcname: str | None = None,
 ) -> Pattern[list[T1]]:
-    _new = pat.copy()
-    _match = _new.match
-
-    def match(self, input_):
-        return list(map(func, _match(input_)))
-
-    _new.match = match.__get__(_new)
+    _new = _pipe(pat, "map", func)
     _new.alias = f"{_new}.map({funcname or func.__name__})"
     
     return _new  # type: ignore
 
 
+@_rebuildable
 def Filter(
     pat: Pattern[list[T]],
     func: Callable[[T], bool],
     funcname: str | None = None,
 ) -> Pattern[list[T]]:
-    _new = pat.copy()
-    _match = _new.match
-
-    def match(self, input_):
-        return list(filter(func, _match(input_)))
-
-    _new.match = match.__get__(_new)
+    _new = _pipe(pat, "filter", func)
     _new.alias = f"{_new}.filter({funcname or func.__name__})"
     
     return _new
@@ -105,16 +258,11 @@ class _SupportsSumWithNoDefaultGiven(SupportsAdd[Any, Any], SupportsRAdd[int, An
 _SupportsSumNoDefaultT = TypeVar("_SupportsSumNoDefaultT", bound=_SupportsSumWithNoDefaultGiven)
 
 
+@_rebuildable
 def Sum(
     pat: Pattern[list[_SupportsSumNoDefaultT]]
 ) -> Pattern[_SupportsSumNoDefaultT]:
-    _new = pat.copy()
-    _match = _new.match
-
-    def match(self, input_):
-        return sum(_match(input_))
-
-    _new.match = match.__get__(_new)
+    _new = _pipe(pat, "sum")
     _new.alias = f"sum({_new})"
     
     return _new  # type: ignore
@@ -138,113 +286,81 @@ def Reduce(
 ) -> Pattern[T1]: ...
 
 
+@_rebuildable
 def Reduce(
     pat: Pattern[list[T]],
     func: Callable[[T, T], T] | Callable[[T1, T], T1],
     initializer: T1 | None = None,
     funcname: str | None = None,
 ) -> Pattern:
-    _new = pat.copy()
-    _match = _new.match
-
-    def match(self, input_):
-        return reduce(func, _match(input_), initializer) if initializer is not None else reduce(func, _match(input_))  # type: ignore
-
-    _new.match = match.__get__(_new)
+    _new = _pipe(pat, "reduce", func, initializer)
     _new.alias = f"{_new}.reduce({funcname or func.__name__})"
     
     return _new  # type: ignore
 
 
+@_rebuildable
 def Join(
     pat: Pattern[list[str]],
     sep: str,
 ) -> Pattern[str]:
-    _new = pat.copy()
-    _match = _new.match
-
-    def match(self, input_):
-        return sep.join(_match(input_))
-
-    _new.match = match.__get__(_new)
+    _new = _pipe(pat, "join", sep)
     _new.alias = f"{_new}.join({sep!r})"
     
     return _new  # type: ignore
 
 
+@_rebuildable
 def Upper(
     pat: Pattern[str],
 ) -> Pattern[str]:
-    _new = pat.copy()
-    _match = _new.match
-
-    def match(self, input_):
-        return _match(input_).upper()
-
-    _new.match = match.__get__(_new)
+    _new = _pipe(pat, "upper")
     _new.alias = f"{_new}.upper()"
     
     return _new  # type: ignore
 
 
+@_rebuildable
 def Lower(
     pat: Pattern[str],
 ) -> Pattern[str]:
-    _new = pat.copy()
-    _match = _new.match
-
-    def match(self, input_):
-        return _match(input_).lower()
-
-    _new.match = match.__get__(_new)
+    _new = _pipe(pat, "lower")
     _new.alias = f"{_new}.lower()"
     
     return _new  # type: ignore
 
 
+@_rebuildable
 def Dot(
     pat: Pattern[Any],
     origin: type[T],
     key: str,
     default: T | None = None,
 ) -> Pattern[T]:
-    _new = pat.copy()
-    _match = _new.match
-
-    def match(self, input_):
-        return getattr(_match(input_), key, default)
-
-    _new.match = match.__get__(_new)
+    _new = _pipe(pat, "getattr", key, default)
     _new.alias = f"{_new}.{key}"
-    
+    # origin 变为结果类型, 输入类型仍与源表达式相同
+    _new._input_types = pat._input_types
     _new.origin = origin
     return _new  # type: ignore
 
 
+@_rebuildable
 def GetItem(
     pat: Pattern[Any],
     origin: type[T],
     key: str,
     default: T | None = None,
 ) -> Pattern[T]:
-    _new = pat.copy()
-    _match = _new.match
-
-    def match(self, input_) -> T:
-        try:
-            return _match(input_)[key]
-        except Exception as e:  # pragma: no cover
-            if default is not None:
-                return default
-            raise e
-
-    _new.match = match.__get__(_new)
+    _new = _pipe(pat, "getitem", key, default)
     _new.alias = f"{_new}.{key}"
-    
+    # origin 变为结果类型, 输入类型仍与源表达式相同
+    _new._input_types = pat._input_types
     _new.origin = origin
     return _new  # type: ignore
 
 
+@_rebuildable
 def Step(
     pat: Pattern[T],
     func: Callable[[T], T1],
@@ -252,13 +368,7 @@ def Step(
     funcname: str | None = None,
     **kwargs,
 ) -> Pattern[T1]:
-    _new = pat.copy()
-    _match = _new.match
-
-    def match(self, input_):
-        return func(_match(input_), *args, **kwargs)
-
-    _new.match = match.__get__(_new)
+    _new = _pipe(pat, "call", func, args, kwargs)
     _new.alias = f"{funcname or func.__name__}({_new})"
     
     return _new  # type: ignore
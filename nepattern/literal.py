@@ -0,0 +1,261 @@
+"""安全的 Python 字面量解析
+
+支持数字, 字符串 (含 b/r/u 前缀), True, False, None 以及嵌套的 list, tuple, set 与 dict; 单次扫描, 不编译或执行任何代码
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Callable
+import unicodedata
+
+from .core import Unmatched
+
+_WS = re.compile(r"\s*")
+_NUMBER = re.compile(
+    r"[+-]?(?:0[xX](?:_?[0-9a-fA-F])+|0[oO](?:_?[0-7])+|0[bB](?:_?[01])+"
+    r"|(?:\d(?:_?\d)*(?:\.(?:\d(?:_?\d)*)?)?|\.\d(?:_?\d)*)(?:[eE][+-]?\d(?:_?\d)*)?)"
+)
+# 序列中最常见的十进制整数元素可一次匹配连同其后的分隔符
+_DECIMAL_ITEM = re.compile(r"\s*([+-]?(?:0|[1-9]\d*))\s*([,\]\)}])")
+_STRING = {
+    "'": re.compile(r"'((?:[^'\\\n]|\\[\s\S])*)'"),
+    '"': re.compile(r'"((?:[^"\\\n]|\\[\s\S])*)"'),
+}
+_PREFIXES = {"b", "r", "u", "br", "rb"}
+_ESCAPE = re.compile(r"\\(x[0-9a-fA-F]{2}|u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8}|[0-7]{1,3}|N\{[^}]+\}|[\s\S])")
+_SIMPLE = {
+    "n": "\n",
+    "t": "\t",
+    "r": "\r",
+    "\\": "\\",
+    "'": "'",
+    '"': '"',
+    "a": "\a",
+    "b": "\b",
+    "f": "\f",
+    "v": "\v",
+    "\n": "",
+}
+_NAMES = {"True": True, "False": False, "None": None}
+
+
+class LiteralError(ValueError):
+    """字面量格式错误或超出限制"""
+
+
+class _Reject(Exception):
+    def __init__(self, res: Unmatched):
+        self.res = res
+
+
+def _unescape(mat: re.Match[str], is_bytes: bool = False) -> str:
+    esc = mat[1]
+    if (char := esc[0]) in _SIMPLE:
+        return _SIMPLE[char]
+    if char == "x" or (not is_bytes and char in "uU"):
+        return chr(int(esc[1:], 16))
+    if char in "01234567":
+        return chr(int(esc, 8))
+    if char == "N" and not is_bytes:
+        try:
+            return unicodedata.lookup(esc[2:-1])
+        except KeyError:
+            raise LiteralError(esc) from None
+    return f"\\{esc}"
+
+
+class _Parser:
+    __slots__ = ("text", "pos", "size", "max_depth", "max_size", "item", "key", "value")
+
+    def __init__(self, text: str, max_depth: int, max_size: int, item, key, value):
+        self.text = text
+        self.pos = 0
+        self.size = 0
+        self.max_depth = max_depth
+        self.max_size = max_size
+        self.item = item
+        self.key = key
+        self.value = value
+
+    def error(self, msg: str):
+        return LiteralError(f"{msg} at position {self.pos}")
+
+    def skip(self) -> str:
+        self.pos = _WS.match(self.text, self.pos).end()  # type: ignore
+        if self.pos >= len(self.text):
+            raise self.error("unexpected end")
+        return self.text[self.pos]
+
+    def hook(self, func: Callable[[Any], Any] | None, value: Any) -> Any:
+        if func is None:
+            return value
+        if (res := func(value)).__class__ is Unmatched:
+            raise _Reject(res)
+        return res
+
+    def parse(self, depth: int) -> Any:
+        char = self.skip()
+        if char in "[({":
+            if depth >= self.max_depth:
+                raise self.error("maximum depth exceeded")
+            self.pos += 1
+            top = depth == 0
+            if char == "[":
+                return self.sequence("]", depth + 1, self.item if top else None)[0]
+            if char == "(":
+                items, comma = self.sequence(")", depth + 1, self.item if top else None)
+                # (x) 只是带括号的表达式, 不是元组
+                return items[0] if len(items) == 1 and not comma else tuple(items)
+            return self.braces(depth + 1, top)
+        if char in "'\"" or char in "bBrRuU":
+            return self.string()
+        if mat := _NUMBER.match(self.text, self.pos):
+            token = mat[0]
+            self.pos = mat.end()
+            if token.lstrip("+-")[:2].lower() in ("0x", "0o", "0b"):
+                return int(token, 0)
+            if "." in token or "e" in token or "E" in token:
+                return float(token)
+            return int(token)
+        for name, value in _NAMES.items():
+            if self.text.startswith(name, self.pos):
+                end = self.pos + len(name)
+                if end >= len(self.text) or not (self.text[end].isalnum() or self.text[end] == "_"):
+                    self.pos = end
+                    return value
+        raise self.error(f"unexpected {char!r}")
+
+    def string(self) -> str | bytes:
+        text = self.text
+        start = self.pos
+        while text[self.pos] not in "'\"":
+            self.pos += 1
+            if self.pos >= len(text) or self.pos - start > 2:
+                raise self.error("invalid string prefix")
+        prefix = text[start : self.pos].lower()
+        if prefix and prefix not in _PREFIXES:
+            raise self.error("invalid string prefix")
+        if not (mat := _STRING[text[self.pos]].match(text, self.pos)):
+            raise self.error("unterminated string")
+        self.pos = mat.end()
+        body = mat[1]
+        is_bytes = "b" in prefix
+        if "\\" in body and "r" not in prefix:
+            body = _ESCAPE.sub(lambda m: _unescape(m, is_bytes), body)
+        if not is_bytes:
+            return body
+        try:
+            return body.encode("latin-1")
+        except UnicodeEncodeError:
+            raise self.error("bytes can only contain ASCII literal characters") from None
+
+    def count(self):
+        self.size += 1
+        if self.size > self.max_size:
+            raise self.error("maximum size exceeded")
+
+    def sequence(self, close: str, depth: int, hook) -> tuple[list, bool]:
+        items = []
+        comma = False
+        while True:
+            if self.skip() == close:
+                self.pos += 1
+                return items, comma
+            self.count()
+            if mat := _DECIMAL_ITEM.match(self.text, self.pos):
+                items.append(self.hook(hook, int(mat[1])))
+                self.pos = mat.end()
+                char = mat[2]
+            else:
+                items.append(self.hook(hook, self.parse(depth)))
+                char = self.skip()
+                self.pos += 1
+            if char == close:
+                return items, comma
+            if char != ",":
+                raise self.error(f"expected ',' or {close!r}")
+            comma = True
+
+    def braces(self, depth: int, top: bool) -> dict | set:
+        if self.skip() == "}":
+            self.pos += 1
+            return {}
+        first = self.parse(depth)
+        if self.skip() != ":":
+            items = [self.hook(self.item if top else None, first)]
+            self.count()
+            char = self.skip()
+            self.pos += 1
+            if char == ",":
+                items.extend(self.sequence("}", depth, self.item if top else None)[0])
+            elif char != "}":
+                raise self.error("expected ',' or '}'")
+            try:
+                return set(items)
+            except TypeError:
+                raise self.error("unhashable set item") from None
+        key_hook = self.key if top else None
+        value_hook = self.value if top else None
+        result = {}
+        key = self.hook(key_hook, first)
+        while True:
+            self.pos += 1  # ':'
+            self.count()
+            value = self.hook(value_hook, self.parse(depth))
+            try:
+                result[key] = value
+            except TypeError:
+                raise self.error("unhashable dict key") from None
+            char = self.skip()
+            self.pos += 1
+            if char == "}":
+                return result
+            if char != ",":
+                raise self.error("expected ',' or '}'")
+            if self.skip() == "}":
+                self.pos += 1
+                return result
+            key = self.hook(key_hook, self.parse(depth))
+            if self.skip() != ":":
+                raise self.error("expected ':'")
+
+
+def parse_literal(
+    text: str,
+    max_depth: int = 32,
+    max_size: int = 100_000,
+    item: Callable[[Any], Any] | None = None,
+    key: Callable[[Any], Any] | None = None,
+    value: Callable[[Any], Any] | None = None,
+) -> Any:
+    """
+    解析 Python 字面量
+
+    Args:
+        text: 字面量文本
+        max_depth: 容器的最大嵌套深度
+        max_size: 所有容器中元素数量之和的上限
+        item: 解析时作用于顶层 list, tuple 或 set 各元素的函数, 如 Pattern.try_match
+        key: 解析时作用于顶层 dict 各键的函数
+        value: 解析时作用于顶层 dict 各值的函数
+
+    Returns:
+        解析结果; item, key 或 value 返回 Unmatched 时立即停止解析并返回该 Unmatched
+
+    Raises:
+        LiteralError: 字面量格式错误或超出限制
+    """
+    parser = _Parser(text, max_depth, max_size, item, key, value)
+    try:
+        res = parser.parse(0)
+    except _Reject as e:
+        return e.res
+    except RecursionError:
+        raise parser.error("maximum depth exceeded") from None
+    if _WS.match(text, parser.pos).end() != len(text):  # type: ignore
+        raise parser.error("unexpected trailing content")
+    return res
+
+
+__all__ = ["LiteralError", "parse_literal"]
@@ -11,7 +11,7 @@ from copy import deepcopy
 import inspect
 from types import FunctionType, LambdaType, MethodType
 import typing
-from typing import Any, ForwardRef, Literal, TypeVar, Union, overload, runtime_checkable, Protocol
+from typing import Any, ForwardRef, Literal, Protocol, TypeVar, Union, overload, runtime_checkable
 from typing_extensions import Annotated, get_args, get_origin
 
 from tarina.lang import lang
@@ -27,20 +27,24 @@ from .base import (
     UnionPattern,
     combine,
 )
-from .context import all_patterns
+from .context import patterns_version, patterns_view
 from .core import Pattern
-from .util import CGenericAlias, CUnionType, GenericAlias, RawStr, TPattern
+from .util import CGenericAlias, CUnionType, DeepCheck, GenericAlias, RawStr, TPattern
 
 _Contents = (Union, CUnionType, Literal)
+_Containers = (list, tuple, set, dict, type, frozenset)
 
 
-def _generic_parser(item: GenericAlias, extra: str) -> Pattern:  # type: ignore
+def _generic_parser(item: GenericAlias, extra: str, policy: DeepCheck | None = None) -> Pattern:  # type: ignore
     origin = get_origin(item)
     if origin is Annotated:
         org, *meta = get_args(item)
         if switch := next((i for i in meta if isinstance(i, dict)), None):
             return SwitchPattern(switch)
-        if not isinstance(_o := parser(org, extra), Pattern):  # type: ignore  # pragma: no cover
+        policy = next((i for i in meta if isinstance(i, DeepCheck)), None)
+        if policy and get_origin(org) not in (*_Contents, Annotated, None):
+            _o = _generic_parser(org, extra, policy)
+        elif not isinstance(_o := parser(org, extra), Pattern):  # type: ignore  # pragma: no cover
             raise TypeError(_o)
         validators = [i for i in meta if callable(i)]  # pragma: no cover
         return combine(
@@ -49,11 +53,14 @@ def _generic_parser(item: GenericAlias, extra: str) -> Pattern:  # type: ignore
             validator=(lambda x: all(i(x) for i in validators)) if validators else None,
         )
     if origin in _Contents:
-        _args = {parser(t, extra) for t in get_args(item)}  # pragma: no cover
+        # 保持参数顺序, 使结果 (及其 spec 与指纹) 不随哈希种子变化
+        _args = list(dict.fromkeys(parser(t, extra) for t in get_args(item)))  # pragma: no cover
         return (_args.pop() if len(_args) == 1 else UnionPattern(*_args)) if _args else ANY
-    if origin in (list, tuple, set, dict, type, frozenset):
+    if origin in _Containers:
         item = origin[get_args(item)]
-    return Pattern(origin=item, alias=f"{repr(item).split('.')[-1]}").accept(item)
+    return Pattern(origin=item, alias=f"{repr(item).split('.')[-1]}").accept(
+        Annotated[item, policy] if policy else item
+    )
 
 
 def _typevar_parser(item: TypeVar):
@@ -66,52 +73,9 @@ def _protocol_parser(item: type):
     return Pattern(alias=f"{item}").accept(item)
 
 
-_T = TypeVar("_T")
-_K = TypeVar("_K")
-
-
-@overload
-def parser(item: TPattern, extra: str = "allow") -> RegexPattern: ...
-
-
-@overload
-def parser(item: list[_T] | tuple[_T, ...] | set[_T], extra: str = "allow") -> UnionPattern[_T]: ...
-
-
-@overload
-def parser(item: dict[_K, _T], extra: str = "allow") -> SwitchPattern[_T, _K]: ...
-
-
-@overload
-def parser(item: TypeVar, extra: str = "allow") -> Pattern[Any]: ...
-
-
-@overload
-def parser(item: type[Protocol], extra: str = "allow") -> Pattern[Any]: ...  # type: ignore
-
-
-@overload
-def parser(item: FunctionType | MethodType | LambdaType, extra: str = "allow") -> Pattern: ...
-
-
-@overload
-def parser(item: type[_T], extra: str = "allow") -> Pattern[_T]: ...
-
-
-@overload
-def parser(item: CUnionType, extra: str = "allow") -> UnionPattern[Any]: ...
-
-
-@overload
-def parser(item: _T, extra: str = "allow") -> Pattern[_T]: ...
-
-
-def parser(item: Any, extra: str = "allow") -> Pattern:
-    """将一般数据类型转为 Pattern 或者特殊类型"""
-    if isinstance(item, Pattern):
-        return item
+def _parser(item: Any, extra: str) -> Pattern:
     with suppress(TypeError):
-        if item and (pat := all_patterns().get(item, None)):
+        if item and (pat := patterns_view().get(item)):
             return pat
     if isinstance(item, (GenericAlias, CGenericAlias, CUnionType)):
         return _generic_parser(item, extra)
@@ -139,7 +103,8 @@ def parser(item: Any, extra: str = "allow") -> Pattern:
             return RegexPattern(pat, alias=f"'{pat}'")
         if "|" in item:
             names = item.split("|")
-            return UnionPattern(*(all_patterns().get(i, i) for i in names if i))
+            view = patterns_view()
+            return UnionPattern(*(view.get(i, i) for i in names if i))
         return DirectPattern(item, alias=f"'{item}'")
     if isinstance(item, RawStr):
         return DirectPattern(item.value, alias=f"'{item.value}'")
@@ -160,4 +125,65 @@ def parser(item: Any, extra: str = "allow") -> Pattern:
     return DirectPattern(item)
 
 
+_T = TypeVar("_T")
+_K = TypeVar("_K")
+_caches: dict[str, tuple[tuple[str, int, int], dict[Any, Pattern]]] = {}
+
+
+@overload
+def parser(item: TPattern, extra: str = "allow") -> RegexPattern: ...
+
+
+@overload
+def parser(item: list[_T] | tuple[_T, ...] | set[_T], extra: str = "allow") -> UnionPattern[_T]: ...
+
+
+@overload
+def parser(item: dict[_K, _T], extra: str = "allow") -> SwitchPattern[_T, _K]: ...
+
+
+@overload
+def parser(item: TypeVar, extra: str = "allow") -> Pattern[Any]: ...
+
+
+@overload
+def parser(item: type[Protocol], extra: str = "allow") -> Pattern[Any]: ...  # type: ignore
+
+
+@overload
+def parser(item: FunctionType | MethodType | LambdaType, extra: str = "allow") -> Pattern: ...
+
+
+@overload
+def parser(item: type[_T], extra: str = "allow") -> Pattern[_T]: ...
+
+
+@overload
+def parser(item: CUnionType, extra: str = "allow") -> UnionPattern[Any]: ...
+
+
+@overload
+def parser(item: _T, extra: str = "allow") -> Pattern[_T]: ...
+
+
+def parser(item: Any, extra: str = "allow") -> Pattern:
+    """将一般数据类型转为 Pattern 或者特殊类型
+
+    结果会按 (item, extra) 缓存, 并在表达式组被修改或切换后失效
+    """
+    if isinstance(item, Pattern):
+        return item
+    version = patterns_version()
+    if (cache := _caches.get(version[0])) is None or cache[0] != version:
+        cache = _caches[version[0]] = (version, {})
+    try:
+        key = (item.__class__, item, getattr(item, "__args__", None), extra)
+        res = cache[1].get(key)
+    except TypeError:  # unhashable
+        return _parser(item, extra)
+    if res is None:
+        res = cache[1][key] = _parser(item, extra)
+    return res
+
+
 __all__ = ["parser"]
@@ -0,0 +1,61 @@
+"""基于进程池的并行批量验证"""
+
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+import pickle
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
+
+from .util import chunked
+
+if TYPE_CHECKING:
+    from .core import BatchResult, Pattern
+
+_pattern: Pattern | None = None
+
+
+def _init_worker(payload: bytes):
+    global _pattern
+    _pattern = pickle.loads(payload)
+
+
+def _execute_chunk(chunk: list[Any]) -> BatchResult:
+    return _pattern.execute_many(chunk)  # type: ignore
+
+
+def iter_parallel(
+    pattern: Pattern, inputs: Iterable[Any], workers: int, chunk_size: int = 4096
+) -> Iterator[BatchResult]:
+    """
+    在进程池中分块执行批量验证, 按输入顺序逐块产出结果
+
+    表达式仅在各工作进程启动时发送一次; 同时在途的块数量不超过工作进程数的两倍, 以限制内存占用
+
+    Args:
+        pattern: 可被 pickle 序列化的表达式
+        inputs: 输入序列
+        workers: 工作进程数
+        chunk_size: 每块的输入数量
+    """
+    payload = pickle.dumps(pattern)
+    pending: deque[tuple[int, Future[BatchResult]]] = deque()
+
+    def _take():
+        offset, future = pending.popleft()
+        res = future.result()
+        res.offset = offset
+        return res
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(payload,)) as executor:
+        offset = 0
+        for chunk in chunked(inputs, chunk_size):
+            pending.append((offset, executor.submit(_execute_chunk, chunk)))
+            offset += len(chunk)
+            if len(pending) >= workers * 2:
+                yield _take()
+        while pending:
+            yield _take()
+
+
+__all__ = ["iter_parallel"]
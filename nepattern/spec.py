@@ -0,0 +1,335 @@
+"""表达式的声明式序列化格式
+
+spec 为可直接 JSON 序列化的 dict, 形如 ``{"version": 1, "pattern": <节点>}``; 节点均为带有 ``"$"`` 键的 dict, 其值为节点类型
+
+内置表达式按名称引用, 用户函数与类型通过 ``模块:限定名`` 或 :func:`register_ref` 注册的名称引用
+
+引用会导入对应的模块, 引用的函数也会在匹配时被调用, 因此只应加载来自可信来源的 spec;
+加载时仅会调用 func 中的派生函数 (Map, Sum 等) 与 :func:`register_ref` 注册的工厂, 以及无参构造 Pattern 的子类
+"""
+
+from __future__ import annotations
+
+from functools import partial
+import hashlib
+import importlib
+import inspect
+import json
+import re
+from typing import Any, Literal, TypeVar, Union, get_args, get_origin
+
+from .core import _BUILTINS, Pattern, _OriginValidator, _RegexPattern
+from .util import CUnionType, DeepCheck
+
+SPEC_VERSION = 1
+
+_T = TypeVar("_T")
+
+_refs: dict[str, Any] = {"Any": Any, "NoneType": type(None), "Union": Union, "Literal": Literal}
+_ref_names: dict[int, str] = {id(value): name for name, value in _refs.items()}
+_registered: set[str] = set()
+
+
+def register_ref(obj: _T, name: str | None = None) -> _T:
+    """注册一个可在 spec 中按名称引用的对象 (通常为用户函数), 可作为装饰器使用
+
+    Args:
+        obj: 要注册的对象
+        name: 引用名称, 默认为对象的 ``模块:限定名``
+    """
+    name = name or f"{obj.__module__}:{obj.__qualname__}"  # type: ignore
+    _refs[name] = obj
+    _registered.add(name)
+    _ref_names[id(obj)] = name
+    return obj
+
+
+def _resolve(name: str) -> Any:
+    if name in _refs:
+        return _refs[name]
+    if ":" not in name:
+        raise LookupError(f"unknown spec reference {name!r}")
+    module, qualname = name.split(":", 1)
+    obj: Any = importlib.import_module(module)
+    for part in qualname.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def _dump_ref(obj: Any) -> dict:
+    if (name := _ref_names.get(id(obj))) is not None and _refs.get(name) is obj:
+        return {"$": "ref", "name": name}
+    owner = getattr(obj, "__objclass__", None)
+    module = getattr(obj, "__module__", None) or getattr(owner, "__module__", None)
+    qualname = getattr(obj, "__qualname__", None)
+    if module and qualname and "<" not in qualname:
+        name = f"{module}:{qualname}"
+        try:
+            if _resolve(name) is obj:
+                return {"$": "ref", "name": name}
+        except (ImportError, AttributeError):
+            pass
+    raise TypeError(f"{obj!r} cannot be referenced by name, register it with register_ref first")
+
+
+def _dump_type(tp: Any) -> Any:
+    if tp is None:
+        return None
+    if tp is ...:
+        return {"$": "ellipsis"}
+    if (origin := get_origin(tp)) is not None:
+        if origin is CUnionType:
+            origin = Union
+        return {"$": "generic", "origin": _dump_ref(origin), "args": [_dump_type(i) for i in get_args(tp)]}
+    if isinstance(tp, (str, int, bool)):  # Literal 的参数
+        return tp
+    if isinstance(tp, DeepCheck):  # Annotated 的参数
+        return {"$": "deep_check", "mode": tp.mode, "k": tp.k, "cache": tp.cache}
+    return _dump_ref(tp)
+
+
+def _dump_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if value is ...:
+        return {"$": "ellipsis"}
+    if isinstance(value, Pattern):
+        return _dump_pattern(value)
+    if isinstance(value, (list, tuple)):
+        return {"$": value.__class__.__name__, "items": [_dump_value(i) for i in value]}
+    if isinstance(value, dict):
+        return {"$": "dict", "items": [[_dump_value(k), _dump_value(v)] for k, v in value.items()]}
+    if isinstance(value, bytes):
+        return {"$": "bytes", "hex": value.hex()}
+    if isinstance(value, re.Pattern):
+        return {"$": "re", "pattern": value.pattern, "flags": value.flags}
+    if isinstance(value, partial):
+        return {
+            "$": "partial",
+            "func": _dump_ref(value.func),
+            "args": [_dump_value(i) for i in value.args],
+            "kwargs": {k: _dump_value(v) for k, v in value.keywords.items()},
+        }
+    if get_origin(value) is not None:
+        return _dump_type(value)
+    return _dump_ref(value)
+
+
+def _dump_pattern(pat: Pattern) -> dict:
+    from .base import (
+        AntiPattern,
+        ContainerPattern,
+        DateTimePattern,
+        DirectPattern,
+        DirectTypePattern,
+        FilePattern,
+        ForwardRefPattern,
+        RegexPattern,
+        SwitchPattern,
+        UnionPattern,
+    )
+
+    if (name := _BUILTINS.get(id(pat))) is not None:
+        return {"$": "builtin", "name": name}
+    if pat._recipe is not None:
+        func, args, kwargs = pat._recipe
+        return {
+            "$": "call",
+            "func": _dump_ref(func),
+            "args": [_dump_value(i) for i in args],
+            "kwargs": {k: _dump_value(v) for k, v in kwargs.items()},
+            "alias": pat.alias,
+        }
+    if "try_match" in pat.__dict__:
+        raise TypeError(f"{pat} has a custom try_match and cannot be described by a spec")
+    cls = pat.__class__
+    if cls is DirectPattern:
+        return {"$": "direct", "target": _dump_value(pat.target), "alias": pat.alias}  # type: ignore
+    if cls is DirectTypePattern:
+        return {"$": "direct_type", "origin": _dump_type(pat.origin), "alias": pat.alias}
+    if cls is RegexPattern:
+        return {"$": "regex", "pattern": _dump_value(pat.pattern), "alias": pat.alias}  # type: ignore
+    if cls is UnionPattern:
+        return {"$": "union", "base": [_dump_value(i) for i in pat.base]}  # type: ignore
+    if cls is SwitchPattern:
+        return {"$": "switch", "cases": _dump_value(pat.switch)["items"]}  # type: ignore
+    if cls is AntiPattern:
+        return {"$": "anti", "pattern": _dump_pattern(pat.base)}  # type: ignore
+    if cls is ForwardRefPattern:
+        node = {"$": "forward_ref", "ref": pat.ref.__forward_arg__}  # type: ignore
+        if (namespace := pat.namespace) is not None:  # type: ignore
+            if isinstance(namespace, dict):
+                raise TypeError(f"{pat} resolves in a dict namespace and cannot be described by a spec")
+            node["namespace"] = namespace if isinstance(namespace, str) else namespace.__name__
+        if pat.version is not None:  # type: ignore
+            node["version"] = _dump_ref(pat.version)  # type: ignore
+        return node
+    if cls is DateTimePattern:
+        return {"$": "datetime", "formats": list(pat.formats), "cache_size": pat.cache_size}  # type: ignore
+    if cls is FilePattern:
+        return {"$": "file", "mode": pat.mode, "max_size": pat.max_size, "alias": pat.alias}  # type: ignore
+    if cls is ContainerPattern:
+        return {
+            "$": "container",
+            "origin": _dump_ref(pat.origin),
+            "item": _dump_value(pat.item),  # type: ignore
+            "key": _dump_value(pat.key),  # type: ignore
+            "value": _dump_value(pat.value),  # type: ignore
+            "alias": pat.alias,
+            "max_depth": pat.max_depth,  # type: ignore
+            "max_size": pat.max_size,  # type: ignore
+        }
+    if cls is Pattern or cls is _RegexPattern:
+        node: dict[str, Any] = {
+            "$": "pattern",
+            "origin": _dump_type(pat.origin),
+            "alias": pat.alias,
+            "check_origin": isinstance(pat._pre_validator, _OriginValidator)
+            and not pat._pre_validate_modified,
+        }
+        if cls is _RegexPattern:
+            node["regex"] = _dump_value(pat.pattern)  # type: ignore
+        if pat._accepts is not Any:
+            node["accepts"] = _dump_type(pat._accepts)
+        if pat._pre_validate_modified and pat._pre_validator:
+            node["pre_validator"] = _dump_value(pat._pre_validator)
+        if pat._converter:
+            node["converter"] = _dump_value(pat._converter)
+        if pat._post_validator:
+            node["post_validator"] = _dump_value(pat._post_validator)
+        return node
+    try:
+        inspect.signature(cls).bind()
+    except TypeError:
+        raise TypeError(f"{cls.__qualname__} cannot be described by a spec") from None
+    return {"$": "instance", "class": _dump_ref(cls), "alias": pat.alias}
+
+
+def _load_pattern(node: dict) -> Pattern:
+    from . import base
+
+    kind = node["$"]
+    if kind == "builtin":
+        return getattr(base, node["name"])
+    if kind == "call":
+        name = node["func"]["name"]
+        func = _resolve(name)
+        if name not in _registered and not getattr(func, "__rebuildable__", False):
+            raise ValueError(f"spec reference {name!r} is not a pattern factory")
+        pat = func(*map(_load_value, node["args"]), **{k: _load_value(v) for k, v in node["kwargs"].items()})
+        pat.alias = node["alias"]
+        return pat
+    if kind == "direct":
+        return base.DirectPattern(_load_value(node["target"]), node["alias"])
+    if kind == "direct_type":
+        return base.DirectTypePattern(_load_value(node["origin"]), node["alias"])
+    if kind == "regex":
+        pat = base.RegexPattern("_", node["alias"])
+        # 直接恢复带锚点的正则, 以保留 prefixed/suffixed 的结果
+        pat.pattern = _load_value(node["pattern"])
+        return pat
+    if kind == "union":
+        return base.UnionPattern(*map(_load_value, node["base"]))
+    if kind == "switch":
+        return base.SwitchPattern({_load_value(k): _load_value(v) for k, v in node["cases"]})
+    if kind == "anti":
+        return base.AntiPattern(_load_pattern(node["pattern"]))
+    if kind == "forward_ref":
+        from typing import ForwardRef
+
+        return base.ForwardRefPattern(
+            ForwardRef(node["ref"]), node.get("namespace"), _load_value(node.get("version"))
+        )
+    if kind == "datetime":
+        return base.DateTimePattern(node["formats"], node["cache_size"])
+    if kind == "file":
+        return base.FilePattern(node["mode"], node["max_size"], node["alias"])
+    if kind == "container":
+        return base.ContainerPattern(
+            _load_value(node["origin"]),
+            _load_value(node["item"]),
+            _load_value(node["key"]),
+            _load_value(node["value"]),
+            node["alias"],
+            node["max_depth"],
+            node["max_size"],
+        )
+    if kind == "instance":
+        cls = _load_value(node["class"])
+        if not isinstance(cls, type) or not issubclass(cls, Pattern):
+            raise ValueError(f"spec reference {node['class']['name']!r} is not a Pattern subclass")
+        pat = cls()
+        pat.alias = node["alias"]
+        return pat
+    if kind == "pattern":
+        origin = _load_value(node["origin"])
+        cls = _RegexPattern if "regex" in node else Pattern
+        pat = cls.__new__(cls)
+        Pattern.__init__(pat, origin if node["check_origin"] else None, node["alias"])
+        pat.origin = origin if origin is not None else Any
+        if "regex" in node:
+            pat.pattern = _load_value(node["regex"])  # type: ignore
+        if "accepts" in node:
+            pat.accept(_load_value(node["accepts"]))
+        if "pre_validator" in node:
+            pat.pre_validate(_load_value(node["pre_validator"]))
+        if "converter" in node:
+            pat.convert(_load_value(node["converter"]))
+        if "post_validator" in node:
+            pat.post_validate(_load_value(node["post_validator"]))
+        return pat
+    raise ValueError(f"unknown spec node {kind!r}")
+
+
+def _load_value(value: Any) -> Any:
+    if not isinstance(value, dict):
+        return value
+    kind = value["$"]
+    if kind == "ref":
+        return _resolve(value["name"])
+    if kind == "ellipsis":
+        return ...
+    if kind == "list":
+        return [_load_value(i) for i in value["items"]]
+    if kind == "tuple":
+        return tuple(_load_value(i) for i in value["items"])
+    if kind == "dict":
+        return {_load_value(k): _load_value(v) for k, v in value["items"]}
+    if kind == "bytes":
+        return bytes.fromhex(value["hex"])
+    if kind == "re":
+        return re.compile(value["pattern"], value["flags"])
+    if kind == "partial":
+        return partial(
+            _resolve(value["func"]["name"]),
+            *map(_load_value, value["args"]),
+            **{k: _load_value(v) for k, v in value["kwargs"].items()},
+        )
+    if kind == "deep_check":
+        return DeepCheck(value["mode"], value["k"], value["cache"])
+    if kind == "generic":
+        origin = _resolve(value["origin"]["name"])
+        args = tuple(_load_value(i) for i in value["args"])
+        return origin[args if len(args) > 1 else args[0]]
+    return _load_pattern(value)
+
+
+def to_spec(pattern: Pattern) -> dict[str, Any]:
+    """将表达式转为 spec"""
+    return {"version": SPEC_VERSION, "pattern": _dump_pattern(pattern)}
+
+
+def from_spec(spec: dict[str, Any]) -> Pattern:
+    """从 spec 构建表达式"""
+    if spec.get("version") != SPEC_VERSION:
+        raise ValueError(f"unsupported spec version {spec.get('version')!r}, expected {SPEC_VERSION}")
+    return _load_pattern(spec["pattern"])
+
+
+def fingerprint(pattern: Pattern | dict[str, Any]) -> str:
+    """表达式结构的稳定指纹, 对结构相同的表达式在不同进程间保持一致"""
+    spec = pattern if isinstance(pattern, dict) else to_spec(pattern)
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+__all__ = ["SPEC_VERSION", "register_ref", "to_spec", "from_spec", "fingerprint"]
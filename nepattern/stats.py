@@ -0,0 +1,153 @@
+"""表达式的运行时统计
+
+启用后记录各表达式 (按别名区分) 的调用次数, 成功与失败次数, 累计与最大耗时, 以及失败发生的阶段;
+统计以匹配函数的钩子实现, 未启用时不产生任何开销
+
+各线程写入自己的分片, 读取时再合并, 因此记录时无需加锁
+"""
+
+from __future__ import annotations
+
+import threading
+from time import perf_counter_ns
+from typing import Any, Callable
+
+from . import core
+from .core import Pattern, Unmatched
+
+STAGES = ("accept", "pre_validate", "convert", "post_validate", "error")
+"""失败阶段; error 表示匹配时抛出了异常"""
+
+_lock = threading.Lock()
+_local = threading.local()
+_shards: list[dict[str, list]] = []
+
+
+def _shard() -> dict[str, list]:
+    try:
+        return _local.shard
+    except AttributeError:
+        shard = _local.shard = {}
+        with _lock:
+            _shards.append(shard)
+        return shard
+
+
+def _failed_stage(pat: Pattern, res: Unmatched) -> str:
+    if res.code == "type":
+        return "accept"
+    if pat.__class__.try_match is not Pattern.try_match or "try_match" in pat.__dict__:
+        return "convert"  # 自定义的匹配函数视作一次转换
+    # 失败的阶段由构建的匹配函数标记, 不再重新执行用户的验证函数; 转换函数返回的 Unmatched 没有标记
+    return res.stage or "convert"
+
+
+def _record(pat: Pattern, elapsed: int, stage: str | None):
+    key = pat.alias or str(pat)
+    if (record := (shard := _shard()).get(key)) is None:
+        # 调用次数, 失败次数, 累计耗时, 最大耗时 (纳秒), 各阶段的失败次数
+        record = shard[key] = [0, 0, 0, 0, dict.fromkeys(STAGES, 0)]
+    record[0] += 1
+    record[2] += elapsed
+    if elapsed > record[3]:
+        record[3] = elapsed
+    if stage is not None:
+        record[1] += 1
+        record[4][stage] += 1
+
+
+def _hook(func: Callable[[Any, Any], Any], self: Pattern, input_: Any):
+    start = perf_counter_ns()
+    try:
+        res = func(self, input_)
+    except Exception:
+        _record(self, perf_counter_ns() - start, "error")
+        raise
+    elapsed = perf_counter_ns() - start
+    _record(self, elapsed, _failed_stage(self, res) if res.__class__ is Unmatched else None)
+    return res
+
+
+def is_enabled() -> bool:
+    """统计是否已启用"""
+    return _hook in core._hooks
+
+
+def enable():
+    """启用统计, 覆盖所有表达式类 (包括此后定义的) 与 func, combine 生成的表达式"""
+    core._install_hook(_hook)
+
+
+def disable():
+    """停用统计, 不再有钩子时恢复原本的匹配函数; 已记录的数据会保留"""
+    core._uninstall_hook(_hook)
+
+
+def reset():
+    """清空已记录的数据"""
+    with _lock:
+        for shard in _shards:
+            shard.clear()
+
+
+def snapshot() -> dict[str, dict[str, Any]]:
+    """合并各线程的记录, 以别名为键返回统计数据; 耗时以秒为单位"""
+    with _lock:
+        shards = [shard.copy() for shard in _shards]
+    merged: dict[str, list] = {}
+    for shard in shards:
+        for key, (calls, failures, total, peak, stages) in shard.items():
+            if (record := merged.get(key)) is None:
+                merged[key] = [calls, failures, total, peak, dict(stages)]
+                continue
+            record[0] += calls
+            record[1] += failures
+            record[2] += total
+            record[3] = max(record[3], peak)
+            for stage, count in stages.items():
+                record[4][stage] += count
+    return {
+        key: {
+            "calls": calls,
+            "successes": calls - failures,
+            "failures": failures,
+            "total_seconds": total / 1e9,
+            "max_seconds": peak / 1e9,
+            "failed_stages": stages,
+        }
+        for key, (calls, failures, total, peak, stages) in merged.items()
+    }
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def to_prometheus(prefix: str = "nepattern") -> str:
+    """以 Prometheus 文本格式导出统计数据"""
+    data = snapshot()
+    metrics = (
+        ("calls_total", "counter", "Number of pattern match calls.", "calls"),
+        ("successes_total", "counter", "Number of successful pattern matches.", "successes"),
+        ("latency_seconds_total", "counter", "Cumulative pattern match latency in seconds.", "total_seconds"),
+        ("latency_seconds_max", "gauge", "Maximum pattern match latency in seconds.", "max_seconds"),
+    )
+    lines = []
+    for name, kind, doc, field in metrics:
+        lines.append(f"# HELP {prefix}_{name} {doc}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        lines.extend(
+            f'{prefix}_{name}{{pattern="{_label(key)}"}} {value[field]}' for key, value in data.items()
+        )
+    lines.append(f"# HELP {prefix}_failures_total Number of failed pattern matches by stage.")
+    lines.append(f"# TYPE {prefix}_failures_total counter")
+    for key, value in data.items():
+        lines.extend(
+            f'{prefix}_failures_total{{pattern="{_label(key)}",stage="{stage}"}} {count}'
+            for stage, count in value["failed_stages"].items()
+            if count
+        )
+    return "\n".join(lines) + "\n"
+
+
+__all__ = ["STAGES", "enable", "disable", "is_enabled", "reset", "snapshot", "to_prometheus"]
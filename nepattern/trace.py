@@ -0,0 +1,197 @@
+"""表达式求值的逐步追踪
+
+在 trace 上下文中, 每次进入表达式都会记录一个事件, 其下依次记录各阶段 (accept, pre_validate, convert, post_validate),
+流水线的源匹配与各步骤 (func 生成的 Map, Filter 等) 以及嵌套进入的子表达式, 连同耗时 (纳秒) 与结果;
+追踪以匹配函数的钩子实现, 仅在存在 trace 上下文时安装, 不追踪时不产生任何开销
+
+记录的位置保存在上下文变量中, 因此不同线程与异步任务的追踪互不干扰
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+from time import perf_counter_ns
+from typing import Any, Callable, Iterator, Literal
+
+from . import core
+from .core import Pattern, Unmatched, _original, _require_async
+from .func import _compile, _pipeline
+from .util import type_checker
+
+Outcome = Literal["success", "failed", "error"]
+
+
+class TraceEvent:
+    """求值事件
+
+    kind 为 pattern (进入表达式), stage (表达式的阶段), source (流水线的源匹配) 或 step (流水线的步骤)
+    """
+
+    __slots__ = ("name", "kind", "input", "outcome", "result", "elapsed", "children")
+
+    def __init__(self, name: str, kind: str, input_: Any = None):
+        self.name = name
+        self.kind = kind
+        self.input = input_
+        self.outcome: Outcome = "success"
+        self.result: Any = None
+        self.elapsed = 0
+        self.children: list[TraceEvent] = []
+
+    def walk(self) -> Iterator[TraceEvent]:
+        """先序遍历自身与所有子事件"""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def format(self, indent: int = 0) -> str:
+        """以缩进的文本树展示事件"""
+        lines = [f"{'  ' * indent}{self.name} [{self.kind}] {self.outcome} {self.elapsed / 1000:.3f}us"]
+        lines.extend(child.format(indent + 1) for child in self.children)
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return (
+            f"TraceEvent({self.name!r}, kind={self.kind!r}, outcome={self.outcome!r}, elapsed={self.elapsed})"
+        )
+
+
+_current: ContextVar[tuple[TraceEvent, Callable[[TraceEvent], None] | None] | None] = ContextVar(
+    "nepattern_trace", default=None
+)
+_lock = threading.Lock()
+_active = 0
+
+
+def _outcome(event: TraceEvent, res: Any) -> Outcome:
+    if res.__class__ is Unmatched:
+        return "failed"
+    if event.kind != "stage":
+        return "success"
+    # 验证阶段以真值判断, 转换阶段返回 None 视作失败
+    return "failed" if (res is None if event.name == "convert" else not res) else "success"
+
+
+def _step(parent: TraceEvent, name: str, kind: str, input_: Any, func: Callable[[TraceEvent], Any]) -> Any:
+    """执行一个阶段或步骤; 其中进入的子表达式记录在该步骤之下"""
+    event = TraceEvent(name, kind, input_)
+    parent.children.append(event)
+    token = _current.set((event, _current.get()[1]))  # type: ignore
+    start = perf_counter_ns()
+    try:
+        res = func(event)
+    except Exception as e:
+        event.outcome = "error"
+        event.result = e
+        raise
+    else:
+        event.outcome = _outcome(event, res)
+        event.result = res
+    finally:
+        event.elapsed = perf_counter_ns() - start
+        _current.reset(token)
+    return res
+
+
+def _stages(pat: Pattern, input_: Any, event: TraceEvent):
+    """按阶段逐个执行, 与 Pattern.compile 构建的匹配函数等价"""
+    accepts = pat._accepts
+    origin = pat.origin
+    if (check := type_checker(accepts)) is not None:
+        if not _step(event, "accept", "stage", input_, lambda _: check(input_)):
+            return Unmatched("type", input_, accepts)
+    if (pre := pat._pre_validator) is not None:
+        if not _step(event, "pre_validate", "stage", input_, lambda _: pre(input_)):
+            return Unmatched("content", input_, origin, stage="pre_validate")
+    if (converter := pat._converter) is None:
+        return input_
+    if (res := _step(event, "convert", "stage", input_, lambda _: converter(pat, input_))) is None:
+        return Unmatched("content", input_, origin, stage="convert")
+    if res.__class__ is Unmatched:
+        return res
+    if (post := pat._post_validator) is not None:
+        if not _step(event, "post_validate", "stage", res, lambda _: post(res)):
+            return Unmatched("content", res, origin, stage="post_validate")
+    return res
+
+
+def _run(func: Callable[[Any, Any], Any], pat: Pattern, input_: Any, event: TraceEvent, source: bool = False):
+    if func is _original(Pattern.__dict__["try_match"]):
+        if not pat._compiled:
+            pat.compile()
+        if pat._compiled is not _require_async:
+            return _stages(pat, input_, event)
+    elif not source and (pipeline := _pipeline(pat)) is not None and func is pipeline[3]:
+        match, _, ops, _ = pipeline
+        res = _step(event, "source", "source", input_, lambda step: _run(match, pat, input_, step, True))
+        for op in ops:
+            if res.__class__ is Unmatched:
+                break
+            run = _compile((op,))
+            res = _step(event, op[0], "step", res, lambda _: run(res))
+        return res
+    return func(pat, input_)
+
+
+def _hook(func: Callable[[Any, Any], Any], self: Pattern, input_: Any):
+    if (state := _current.get()) is None:
+        return func(self, input_)
+    parent, callback = state
+    event = TraceEvent(self.alias or str(self), "pattern", input_)
+    parent.children.append(event)
+    token = _current.set((event, callback))
+    start = perf_counter_ns()
+    try:
+        res = _run(func, self, input_, event)
+    except Exception as e:
+        event.outcome = "error"
+        event.result = e
+        raise
+    else:
+        event.outcome = _outcome(event, res)
+        event.result = res
+    finally:
+        event.elapsed = perf_counter_ns() - start
+        _current.reset(token)
+        if callback is not None:
+            callback(event)
+    return res
+
+
+@contextmanager
+def trace(callback: Callable[[TraceEvent], None] | None = None) -> Iterator[TraceEvent]:
+    """
+    在上下文中追踪表达式的求值
+
+    Args:
+        callback: 每个表达式事件结束时调用, 子事件先于父事件
+
+    Returns:
+        根事件, 其 children 为上下文中各次顶层匹配的事件
+    """
+    global _active
+    root = TraceEvent("trace", "root")
+    with _lock:
+        _active += 1
+        if _active == 1:
+            core._install_hook(_hook)
+    token = _current.set((root, callback))
+    start = perf_counter_ns()
+    try:
+        yield root
+    finally:
+        root.elapsed = perf_counter_ns() - start
+        if any(child.outcome == "error" for child in root.children):
+            root.outcome = "error"
+        elif any(child.outcome == "failed" for child in root.children):
+            root.outcome = "failed"
+        _current.reset(token)
+        with _lock:
+            _active -= 1
+            if _active == 0:
+                core._uninstall_hook(_hook)
+
+
+__all__ = ["TraceEvent", "trace"]
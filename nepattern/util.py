@@ -1,10 +1,31 @@
 from __future__ import annotations
 
+from collections.abc import Iterable as ABCIterable
+from collections.abc import Mapping as ABCMapping
+from collections.abc import Sequence as ABCSequence
 import dataclasses
+from inspect import isclass
+from itertools import islice
+import os
+from random import sample
 import sys
 from types import GenericAlias as CGenericAlias  # noqa: F401
-from typing import TYPE_CHECKING, List, Pattern, Union
-from typing_extensions import TypeAlias
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Pattern,
+    TypeVar,
+    Union,
+)
+from typing_extensions import Annotated, TypeAlias, get_args, get_origin, is_typeddict
+
+from tarina import LRU, generic_isinstance
 
 from .i18n import lang as lang  # noqa: F401
 
@@ -29,3 +50,272 @@ UnionType: type = type(Union[int, str])
 @dataclasses.dataclass
 class RawStr:
     value: str
+
+
+def iter_source(
+    source: str | os.PathLike | IO | Iterable[Any], encoding: str = "utf-8", buffering: int = 1 << 20
+) -> Iterator[Any]:
+    """将路径, 文件对象或可迭代对象展开为逐项的输入; 文件按行读取并去除行尾换行符"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding=encoding, buffering=buffering) as f:
+            for line in f:
+                yield line.rstrip("\r\n")
+    elif hasattr(source, "readline"):
+        for line in source:  # type: ignore
+            yield line.rstrip(b"\r\n" if isinstance(line, bytes) else "\r\n")
+    else:
+        yield from source  # type: ignore
+
+
+def chunked(iterable: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    """将可迭代对象按固定大小分块"""
+    if size < 1:
+        raise ValueError(size)
+    it = iter(iterable)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def flatten_types(tp: Any) -> tuple[type, ...] | None:
+    """将类型表达式展开为可用于 isinstance 的类型元组, 无法确定时返回 None"""
+    if tp is Any or tp is object:
+        return None
+    if isinstance(tp, TypeVar):
+        if tp.__constraints__:
+            return flatten_types(tuple(tp.__constraints__))
+        return flatten_types(tp.__bound__) if tp.__bound__ else None
+    origin = get_origin(tp)
+    if origin is Annotated:
+        return flatten_types(get_args(tp)[0])
+    if isinstance(tp, tuple) or origin is Union or origin is CUnionType:
+        res = []
+        for arg in tp if isinstance(tp, tuple) else get_args(tp):
+            if (types := flatten_types(arg)) is None:
+                return None
+            res.extend(types)
+        return tuple(res)
+    if origin is not None:
+        tp = origin
+    if isinstance(tp, type) and not getattr(tp, "_is_protocol", False):
+        return (tp,)
+    return None
+
+
+class _IsInstance:
+    """isinstance 检查, types 为展开后的类型元组"""
+
+    __slots__ = ("types",)
+
+    def __init__(self, types: tuple[type, ...]):
+        self.types = types
+
+    def __call__(self, obj: Any) -> bool:
+        return isinstance(obj, self.types)
+
+
+class _InLiteral:
+    """Literal 的成员检查"""
+
+    __slots__ = ("values",)
+
+    def __init__(self, values: frozenset | tuple):
+        self.values = values
+
+    def __call__(self, obj: Any) -> bool:
+        try:
+            return obj in self.values
+        except TypeError:  # 不可哈希的输入
+            return False
+
+
+class _AnyOf:
+    """任一检查通过即可"""
+
+    __slots__ = ("checkers",)
+
+    def __init__(self, checkers: tuple[Callable[[Any], bool], ...]):
+        self.checkers = checkers
+
+    def __call__(self, obj: Any) -> bool:
+        for checker in self.checkers:
+            if checker(obj):
+                return True
+        return False
+
+
+@dataclasses.dataclass(frozen=True)
+class DeepCheck:
+    """泛型容器元素的检查策略, 通过 Annotated[list[int], DeepCheck(...)] 指定, 并作用于其中嵌套的泛型
+
+    Attributes:
+        mode: full 检查全部元素; first 只检查前 k 个; sample 随机检查 k 个 (无序容器同 first); shallow 只检查容器类型
+        k: first 与 sample 检查的元素数量
+        cache: 记住最近通过检查的 tuple 与 frozenset 的数量, 同一对象再次出现时直接通过; 为 0 时不缓存
+    """
+
+    mode: Literal["full", "first", "sample", "shallow"] = "full"
+    k: int = 16
+    cache: int = 0
+
+    def __post_init__(self):
+        if self.mode not in ("full", "first", "sample", "shallow"):
+            raise ValueError(f"unknown deep check mode {self.mode!r}")
+        if self.k < 1:
+            raise ValueError(self.k)
+
+
+class _GenericChecker:
+    """带参数的泛型检查, 与 generic_isinstance 一致地逐个检查元素"""
+
+    __slots__ = ("origin", "args", "variadic", "policy", "_cache")
+
+    def __init__(
+        self,
+        origin: type,
+        args: tuple[Callable[[Any], bool] | None, ...],
+        variadic: bool = False,
+        policy: DeepCheck | None = None,
+    ):
+        self.origin = origin
+        self.args = args
+        self.variadic = variadic
+        self.policy = policy
+        # 仅缓存不可变容器; 其中若含有可变元素, 元素在通过检查后的修改不会被察觉
+        self._cache = LRU(policy.cache) if policy and policy.cache and origin in (tuple, frozenset) else None
+
+    def __reduce__(self):
+        return self.__class__, (self.origin, self.args, self.variadic, self.policy)
+
+    def _select(self, obj: Any) -> Iterable[Any]:
+        """按策略选取需要检查的元素"""
+        if (policy := self.policy) is None or policy.mode == "full":
+            return obj
+        k = policy.k
+        try:
+            if len(obj) <= k:
+                return obj
+        except TypeError:  # 没有长度的可迭代对象
+            return islice(obj, k)
+        if policy.mode == "sample" and isinstance(obj, ABCSequence):
+            return [obj[i] for i in sample(range(len(obj)), k)]
+        return islice(obj, k)
+
+    def __call__(self, obj: Any) -> bool:
+        if not isinstance(obj, self.origin):
+            return False
+        if (cache := self._cache) is not None and cache.get(id(obj)) is obj:
+            return True
+        args = self.args
+        try:
+            if self.origin is tuple and not self.variadic:
+                res = len(args) == len(obj) and all(check is None or check(i) for check, i in zip(args, obj))
+            elif len(args) == 1:
+                if (check := args[0]) is None or not isinstance(obj, ABCIterable):
+                    return True
+                res = all(map(check, self._select(obj)))
+            elif len(args) == 2 and isinstance(obj, ABCMapping):
+                key, value = args
+                if self.policy is None or self.policy.mode == "full":
+                    return (key is None or all(map(key, obj.keys()))) and (
+                        value is None or all(map(value, obj.values()))
+                    )
+                return all(
+                    (key is None or key(k)) and (value is None or value(v))
+                    for k, v in self._select(obj.items())
+                )
+            else:
+                return True
+        except TypeError:
+            return False
+        if res and cache is not None:
+            cache[id(obj)] = obj
+        return res
+
+
+class _Fallback:
+    """无法特化的类型表达式, 交由 generic_isinstance 检查"""
+
+    __slots__ = ("tp",)
+
+    def __init__(self, tp: Any):
+        self.tp = tp
+
+    def __call__(self, obj: Any) -> bool:
+        return generic_isinstance(obj, self.tp)
+
+
+def type_determined(checker: Callable[[Any], bool] | None) -> bool:
+    """检查结果是否只取决于输入的类型, 即可按类型缓存
+
+    运行时协议按类型视作确定, 其结果在实例属性与类不一致时可能不同
+    """
+    if checker is None or checker.__class__ is _IsInstance:
+        return True
+    if checker.__class__ is _AnyOf:
+        return all(map(type_determined, checker.checkers))  # type: ignore
+    return checker.__class__ is _Fallback and isclass(checker.tp) and not is_typeddict(checker.tp)  # type: ignore
+
+
+def _union_checker(members: Iterable[Any], policy: DeepCheck | None = None) -> Callable[[Any], bool] | None:
+    types: list[type] = []
+    values: list[Any] = []
+    others: list[Callable[[Any], bool]] = []
+    for member in members:
+        if (checker := type_checker(member, policy)) is None:
+            return None
+        if checker.__class__ is _IsInstance:
+            types.extend(checker.types)  # type: ignore
+        elif checker.__class__ is _InLiteral:
+            values.extend(checker.values)  # type: ignore
+        else:
+            others.append(checker)
+    if types:
+        others.insert(0, _IsInstance(tuple(dict.fromkeys(types))))
+    if values:
+        others.insert(0, type_checker(Literal[tuple(values)]))  # type: ignore
+    return others[0] if len(others) == 1 else _AnyOf(tuple(others))
+
+
+def type_checker(tp: Any, policy: DeepCheck | None = None) -> Callable[[Any], bool] | None:
+    """将类型表达式预编译为检查函数, 结果与 generic_isinstance 一致; 对任意输入均通过时返回 None
+
+    类与类的 Union 编译为对类型元组的 isinstance, Literal 编译为集合的成员检查, 带参数的泛型按 policy 检查元素
+
+    Args:
+        tp: 类型表达式
+        policy: 泛型元素的检查策略, 默认检查全部元素; 可被 Annotated 中的 DeepCheck 覆盖
+    """
+    if tp is Any:
+        return None
+    origin = get_origin(tp)
+    try:
+        if origin is Annotated:
+            org, *meta = get_args(tp)
+            return type_checker(org, next((i for i in meta if isinstance(i, DeepCheck)), policy))
+        if origin is Literal:
+            args = get_args(tp)
+            try:
+                return _InLiteral(frozenset(args))
+            except TypeError:
+                return _InLiteral(args)
+        if origin is Union or origin is CUnionType or tp.__class__ is tuple:
+            return _union_checker(tp if tp.__class__ is tuple else get_args(tp), policy)
+        if is_typeddict(tp):
+            return _Fallback(tp)
+        if isclass(tp) and origin is None:
+            return _Fallback(tp) if getattr(tp, "_is_protocol", False) else _IsInstance((tp,))
+        if isinstance(tp, TypeVar):
+            if tp.__constraints__:
+                return _union_checker(tp.__constraints__, policy)
+            return type_checker(tp.__bound__, policy) if tp.__bound__ else None
+        if isclass(origin):
+            if not (args := get_args(tp)) or (policy and policy.mode == "shallow"):
+                return _IsInstance((origin,))
+            if origin is tuple and len(args) == 2 and args[1] is Ellipsis:
+                return _GenericChecker(origin, (type_checker(args[0], policy),), True, policy)
+            if origin is not tuple and len(args) not in (1, 2):
+                return _IsInstance((origin,))
+            return _GenericChecker(origin, tuple(type_checker(i, policy) for i in args), False, policy)
+    except TypeError:  # pragma: no cover
+        pass
+    return _Fallback(tp)
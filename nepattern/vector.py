@@ -0,0 +1,511 @@
+"""数值, 布尔与时间表达式的向量化批量转换
+
+安装了 NumPy 时输出 ndarray, 否则退回到标准库 array 输出紧凑的类型化数组
+"""
+
+from __future__ import annotations
+
+from array import array
+from datetime import datetime, timedelta, timezone
+from functools import reduce
+import math
+import operator
+import re
+from typing import TYPE_CHECKING, Any, Callable, Iterable
+import warnings
+
+from .core import Unmatched
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if TYPE_CHECKING:
+    from .core import Pattern
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_TYPECODES = {"int": "q", "float": "d", "bool": "b", "datetime": "q"}
+_DTYPES = {"int": "int64", "float": "float64", "bool": "bool", "datetime": "datetime64[us]"}
+
+
+def _naive(value: datetime) -> datetime:
+    """带时区的时间统一转为 UTC 下的无时区时间"""
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+def _micros(value: datetime) -> int:
+    return (_naive(value) - _EPOCH) // _MICROSECOND
+
+
+_CASTS: dict[str, Callable[[Any], Any]] = {"int": int, "float": float, "bool": bool, "datetime": _micros}
+
+
+class ArrayResult:
+    """向量化批量验证结果
+
+    values 与 mask 等长, mask 为真的位置表示验证成功, 其余位置的值无意义
+    """
+
+    __slots__ = ("values", "mask")
+
+    def __init__(self, values: Any, mask: Any):
+        self.values = values
+        self.mask = mask
+
+    @property
+    def success(self) -> bool:
+        """是否全部验证成功"""
+        if np is not None and isinstance(self.mask, np.ndarray):
+            return bool(self.mask.all())
+        return all(self.mask)
+
+    @property
+    def failures(self) -> list[int]:
+        """验证失败的项的下标"""
+        if np is not None and isinstance(self.mask, np.ndarray):
+            return np.flatnonzero(~self.mask).tolist()
+        return [i for i, ok in enumerate(self.mask) if not ok]
+
+    def __len__(self):
+        return len(self.mask)
+
+    def __repr__(self):
+        return f"ArrayResult(values={self.values!r}, mask={self.mask!r})"
+
+
+def _stdlib_array(pattern: Pattern, inputs: Iterable[Any], kind: str) -> ArrayResult:
+    values = array(_TYPECODES[kind])
+    mask = array("b")
+    cast = _CASTS[kind]
+    try_match = pattern.try_match
+    for input_ in inputs:
+        try:
+            if (res := try_match(input_)).__class__ is not Unmatched:
+                values.append(cast(res))
+                mask.append(1)
+                continue
+        except Exception:
+            pass
+        values.append(0)
+        mask.append(0)
+    return ArrayResult(values, mask)
+
+
+def _as_ndarray(inputs: Iterable[Any]):
+    if isinstance(inputs, np.ndarray):
+        arr = inputs
+    else:
+        seq = inputs if isinstance(inputs, (list, tuple)) else list(inputs)
+        types = set(map(type, seq))
+        if len(types) == 1 and (tp := types.pop()) in (str, bytes, int, float, bool):
+            try:
+                arr = np.array(seq, dtype=tp)
+            except OverflowError:
+                arr = np.array(seq, dtype=object)
+        else:
+            arr = np.array(seq, dtype=object)
+    if arr.dtype.kind == "S":
+        arr = np.char.decode(arr)
+    return arr
+
+
+def _decimal(arr, point: bool):
+    """逐列解析形如 [+-]digits[.digits] 的定长字符串数组
+
+    返回 (尾数, 小数位数, 是否为负, 有效位数, mask); 带空白或指数等其他写法的项 mask 为假, 交由逐项转换
+    """
+    size = len(arr)
+    codes = np.ascontiguousarray(arr).view(np.uint32).reshape(size, -1)
+    lengths = np.char.str_len(arr)
+    first = codes[:, 0] if codes.shape[1] else np.zeros(size, dtype=np.uint32)
+    negative = first == 45
+    start = (negative | (first == 43)).astype(np.int64)
+    mantissa = np.zeros(size, dtype=np.int64)
+    digits = np.zeros(size, dtype=np.int64)
+    scale = np.zeros(size, dtype=np.int64)
+    seen = np.zeros(size, dtype=bool)
+    mask = lengths > start
+    for j in range(codes.shape[1]):
+        col = codes[:, j].astype(np.int64) - 48
+        active = (j >= start) & (j < lengths)
+        digit = active & (col >= 0) & (col <= 9)
+        if point:
+            dot = active & (col == -2)
+            mask &= ~(dot & seen)
+            seen |= dot
+            mask &= ~active | digit | dot
+            scale += digit & seen
+        else:
+            mask &= ~active | digit
+        mantissa = np.where(digit, mantissa * 10 + col, mantissa)
+        digits += digit
+    return mantissa, scale, negative, digits, mask & (digits >= 1)
+
+
+def _int_kernel(arr):
+    if arr.dtype.kind in "iub":
+        return arr.astype(np.int64), np.ones(len(arr), dtype=bool)
+    if arr.dtype.kind == "f":
+        mask = np.isfinite(arr) & (np.abs(arr) < 2**63)
+        return np.where(mask, arr, 0).astype(np.int64), mask
+    if arr.dtype.kind == "U":
+        mantissa, _, negative, digits, mask = _decimal(arr, False)
+        # 18 位以内的十进制数不会溢出 int64
+        return np.where(negative, -mantissa, mantissa), mask & (digits <= 18)
+
+
+def _float_kernel(arr):
+    if arr.dtype.kind in "iufb":
+        return arr.astype(np.float64), np.ones(len(arr), dtype=bool)
+    if arr.dtype.kind == "U":
+        mantissa, scale, negative, digits, mask = _decimal(arr, True)
+        # 尾数与 10 的幂均可被 float64 精确表示时, 一次除法的结果与 float() 一致
+        values = mantissa / 10.0 ** np.minimum(scale, 22)
+        return np.where(negative, -values, values), mask & (digits <= 15) & (scale <= 22)
+
+
+def bool_kernel(true_values: Iterable[Any], false_values: Iterable[Any]):
+    """根据真值与假值集合构建布尔转换的向量化核"""
+    true_str = [i for i in true_values if isinstance(i, str)]
+    false_str = [i for i in false_values if isinstance(i, str)]
+    true_num = [i for i in true_values if isinstance(i, int)]
+    false_num = [i for i in false_values if isinstance(i, int)]
+
+    def kernel(arr):
+        if arr.dtype.kind == "b":
+            return arr.copy(), np.ones(len(arr), dtype=bool)
+        if arr.dtype.kind == "U":
+            lower = np.char.lower(arr)
+            true, false = np.isin(lower, true_str), np.isin(lower, false_str)
+            return true, true | false
+        if arr.dtype.kind in "iu":
+            true, false = np.isin(arr, true_num), np.isin(arr, false_num)
+            return true, true | false
+
+    return kernel
+
+
+# 各 Python 版本的 datetime.fromisoformat 与 NumPy 的转换结果都一致的 ISO-8601 子集, 其余输入交由表达式逐项解析
+_ISO_DATETIME = re.compile(r"\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d{3}|\.\d{6})?)?)?")
+
+
+def _datetime_kernel(arr):
+    if arr.dtype.kind != "U":
+        return
+    mask = np.fromiter((_ISO_DATETIME.fullmatch(i) is not None for i in arr.tolist()), bool, len(arr))
+    values = np.full(len(arr), np.datetime64("NaT"), dtype="datetime64[us]")
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            values[mask] = arr[mask].astype("datetime64[us]")
+    except (ValueError, Warning):
+        return
+    return values, mask
+
+
+KERNELS = {"int": _int_kernel, "float": _float_kernel, "datetime": _datetime_kernel}
+
+
+def convert_array(
+    pattern: Pattern, inputs: Iterable[Any], kind: str, kernel: Callable | None = None
+) -> ArrayResult:
+    """
+    将一组输入批量转换为类型化数组
+
+    Args:
+        pattern: 用于逐项转换无法向量化的输入的表达式
+        inputs: 输入序列或 ndarray
+        kind: 输出类型, 可为 int, float, bool 或 datetime
+        kernel: 向量化核, 接受 ndarray 并返回 (values, mask); 返回 None 时表示无法向量化
+    """
+    if np is None:
+        return _stdlib_array(pattern, inputs, kind)
+    arr = _as_ndarray(inputs)
+    kernel = kernel or KERNELS[kind]
+    if (res := kernel(arr)) is None:
+        values, mask = np.zeros(len(arr), dtype=_DTYPES[kind]), np.zeros(len(arr), dtype=bool)
+    else:
+        values, mask = res
+    if not mask.all():
+        cast = np.datetime64 if kind == "datetime" else _CASTS[kind]
+        try_match = pattern.try_match
+        for index in np.flatnonzero(~mask):
+            input_ = arr[index]
+            if isinstance(input_, np.generic):
+                input_ = input_.item()
+            try:
+                if (item := try_match(input_)).__class__ is Unmatched:
+                    continue
+                values[index] = cast(_naive(item)) if kind == "datetime" else cast(item)
+                mask[index] = True
+            except Exception:
+                continue
+    return ArrayResult(values, mask)
+
+
+_INT_LIMIT = 2**62
+_FLOAT_EXACT = 2**53
+"""绝对值小于该值的整数转为 float64 时不损失精度"""
+
+_BINARY: dict[str, tuple[Callable[[Any, Any], Any], str]] = {
+    "add": (operator.add, "+"),
+    "sub": (operator.sub, "-"),
+    "mul": (operator.mul, "*"),
+    "truediv": (operator.truediv, "/"),
+    "floordiv": (operator.floordiv, "//"),
+    "mod": (operator.mod, "%"),
+    "pow": (operator.pow, "**"),
+    "lt": (operator.lt, "<"),
+    "le": (operator.le, "<="),
+    "gt": (operator.gt, ">"),
+    "ge": (operator.ge, ">="),
+    "eq": (operator.eq, "=="),
+    "ne": (operator.ne, "!="),
+    "and": (operator.and_, "&"),
+    "or": (operator.or_, "|"),
+}
+_UNARY: dict[str, tuple[Callable[[Any], Any], str]] = {
+    "neg": (operator.neg, "-"),
+    "pos": (operator.pos, "+"),
+    "abs": (abs, "abs"),
+    "invert": (operator.invert, "~"),
+}
+
+
+def _bound(value: Any, bound: int) -> int | None:
+    if isinstance(value, Expr):
+        return value._bound(bound)
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, int):
+        return abs(value)
+    return 0  # 浮点数不会发生整数溢出
+
+
+def _floating(value: Any) -> bool:
+    """结果是否可能为浮点数"""
+    if isinstance(value, Expr):
+        return value.op == "truediv" or any(_floating(i) for i in value.args)
+    return isinstance(value, float)
+
+
+class Expr:
+    """可向量化的逐元素表达式
+
+    由 X 出发通过算术, 比较与位运算构建, 如 ``X * 2 + 1``, ``(X % 2 == 0) & (X > 3)``;
+    对单个数值与 ndarray 均可直接调用, 作为 func.Map/Filter 的函数时可走向量化路径
+    """
+
+    __slots__ = ("op", "args")
+
+    def __init__(self, op: str, *args: Any):
+        self.op = op
+        self.args = args
+
+    def __call__(self, value: Any) -> Any:
+        if self.op == "x":
+            return value
+        args = [i(value) if isinstance(i, Expr) else i for i in self.args]
+        if self.op in _UNARY:
+            return _UNARY[self.op][0](args[0])
+        return _BINARY[self.op][0](*args)
+
+    def _bound(self, bound: int) -> int | None:
+        """输入的绝对值不超过 bound 时, 计算过程中整数绝对值的上界; 无法确定时返回 None"""
+        if self.op == "x":
+            return bound
+        bounds = [_bound(i, bound) for i in self.args]
+        if None in bounds:
+            return None
+        if self.op in ("lt", "le", "gt", "ge", "eq", "ne"):
+            # 结果为布尔值, 但比较的两侧仍需计算; 与浮点数比较时 NumPy 先将整数转为浮点数, 而 Python 精确比较
+            if max(bounds) >= _FLOAT_EXACT and any(_floating(i) for i in self.args):
+                return None
+            return max(bounds)
+        if self.op in ("neg", "pos", "abs", "invert"):
+            return bounds[0] + 1
+        left, right = bounds
+        if self.op in ("add", "sub", "and", "or"):
+            return left + right
+        if self.op == "mul":
+            return left * right
+        if self.op == "truediv":
+            # NumPy 先将整数转为浮点数再相除, 而 Python 的整数除法直接得到正确舍入的结果
+            return left if max(left, right) < _FLOAT_EXACT else None
+        if self.op == "floordiv":
+            return left
+        if self.op == "mod":
+            return max(left, right)
+        exponent = self.args[1]
+        if isinstance(exponent, int) and exponent >= 0 and (left < 2 or exponent * math.log2(left) < 63):
+            return left**exponent
+        return None
+
+    def __repr__(self):
+        if self.op == "x":
+            return "X"
+        if self.op == "abs":
+            return f"abs({self.args[0]!r})"
+        if self.op in _UNARY:
+            return f"{_UNARY[self.op][1]}{self.args[0]!r}"
+        return f"({self.args[0]!r} {_BINARY[self.op][1]} {self.args[1]!r})"
+
+    @property
+    def __name__(self):
+        name = repr(self)
+        return name[1:-1] if self.op in _BINARY else name
+
+    __hash__ = object.__hash__
+
+
+def _binary(op: str, reflected: bool = False):
+    if reflected:
+        return lambda self, other: Expr(op, other, self)
+    return lambda self, other: Expr(op, self, other)
+
+
+for _op in _BINARY:
+    _name = {"and": "and_", "or": "or_"}.get(_op, _op).rstrip("_")
+    setattr(Expr, f"__{_name}__", _binary(_op))
+    if _op not in ("lt", "le", "gt", "ge", "eq", "ne"):
+        setattr(Expr, f"__r{_name}__", _binary(_op, True))
+for _op in _UNARY:
+    setattr(Expr, f"__{_op}__", lambda self, op=_op: Expr(op, self))
+
+X = Expr("x")
+"""逐元素表达式的输入"""
+
+_REDUCERS: dict[Any, str] = {operator.add: "add", operator.mul: "multiply", max: "maximum", min: "minimum"}
+_SAFE_UFUNCS = {"absolute", "negative", "positive", "sign", "floor", "ceil", "rint", "trunc"}
+
+
+def _elementwise(func: Any) -> bool:
+    return isinstance(func, Expr) or (np is not None and isinstance(func, np.ufunc) and func.nin == 1)
+
+
+def _reducer(func: Any):
+    if np is None:
+        return
+    if isinstance(func, np.ufunc):
+        return func if func.nin == 2 else None
+    try:
+        return getattr(np, _REDUCERS[func])
+    except (KeyError, TypeError):
+        return
+
+
+def segment_length(ops: tuple[tuple, ...], start: int) -> int:
+    """从 start 起可以整体向量化执行的步骤数量"""
+    if np is None:
+        return 0
+    end = start
+    while end < len(ops) and ops[end][0] in ("map", "filter") and _elementwise(ops[end][1]):
+        end += 1
+    if end < len(ops) and (ops[end][0] == "sum" or (ops[end][0] == "reduce" and _reducer(ops[end][1]))):
+        end += 1
+    return end - start
+
+
+def _numeric_array(res: Any, convert: bool):
+    if isinstance(res, np.ndarray):
+        return res if res.ndim == 1 and res.dtype.kind in "iufb" else None
+    if not convert or not isinstance(res, (list, tuple)) or not res:
+        return
+    try:
+        arr = np.array(res)
+    except (ValueError, TypeError, OverflowError):
+        return
+    if arr.ndim != 1:
+        return
+    # 超出 int64 的整数会得到 uint64 或 object; 整数与浮点数混合时需保留各自的类型, 不能向量化
+    if arr.dtype.kind == "i" or (arr.dtype.kind == "f" and set(map(type, res)) == {float}):
+        return arr
+
+
+def _run_segment(ops: tuple[tuple, ...], arr):
+    integer = arr.dtype.kind in "iub"
+    bound = max(-int(arr.min()), int(arr.max())) if integer and len(arr) else 0
+    for kind, *args in ops:
+        func = args[0] if args else None
+        if kind == "map":
+            if integer and isinstance(func, Expr):
+                if (bound := func._bound(bound)) is None or bound >= _INT_LIMIT:
+                    return
+            out = np.asarray(func(arr))
+            if (
+                integer
+                and not isinstance(func, Expr)
+                and out.dtype.kind in "iu"
+                and func.__name__ not in _SAFE_UFUNCS
+            ):
+                return
+            if out.shape != arr.shape or out.dtype.kind not in "iufb":
+                return
+            arr = out
+            if arr.dtype.kind == "b":
+                bound = 1
+            integer = arr.dtype.kind in "iub"
+        elif kind == "filter":
+            if integer and isinstance(func, Expr) and ((b := func._bound(bound)) is None or b >= _INT_LIMIT):
+                return
+            mask = np.asarray(func(arr))
+            if mask.shape != arr.shape:
+                return
+            arr = arr[mask.astype(bool)]
+        elif kind == "sum":
+            if not integer:
+                # NumPy 对浮点数按对分求和, 结果与逐个相加的 sum 不一致
+                return sum(arr.tolist())
+            if bound * len(arr) >= _INT_LIMIT:
+                return
+            return arr.sum().item()
+        else:
+            ufunc, initializer = _reducer(func), args[1]
+            if not len(arr) and initializer is None:
+                return
+            if integer:
+                peak = max(bound, _bound(initializer, bound) or 0)
+                if ufunc.__name__ == "add" and peak * (len(arr) + 1) >= _INT_LIMIT:
+                    return
+                if ufunc.__name__ == "multiply" and peak > 1 and (len(arr) + 1) * math.log2(peak) >= 62:
+                    return
+                if ufunc.__name__ not in ("add", "multiply", "maximum", "minimum"):
+                    return
+            elif ufunc.__name__ == "add":
+                # 与 sum 相同, 浮点数按顺序逐个相加
+                items = arr.tolist()
+                return reduce(func, items) if initializer is None else reduce(func, items, initializer)
+            if initializer is None:
+                return ufunc.reduce(arr).item()
+            return ufunc.reduce(arr, initial=initializer).item()
+    return arr.tolist()
+
+
+def vector_segment(ops: tuple[tuple, ...], fallback: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """
+    构建一段 func 步骤的向量化执行函数
+
+    上游结果为同类型的 int/float 序列或数值 ndarray 时整体交由 NumPy 执行, 否则 (或可能发生整数溢出, 运算出错时) 使用 fallback 逐元素执行
+
+    Args:
+        ops: 由 segment_length 确认可向量化的步骤
+        fallback: 逐元素执行这些步骤的函数
+    """
+    convert = any(op[0] in ("map", "filter") for op in ops)
+
+    def run(res):
+        if (arr := _numeric_array(res, convert)) is not None:
+            try:
+                with np.errstate(all="raise"):
+                    if (out := _run_segment(ops, arr)) is not None:
+                        return out
+            except (ArithmeticError, ValueError, TypeError):
+                pass
+        return fallback(res)
+
+    return run
+
+
+__all__ = ["ArrayResult", "convert_array", "bool_kernel", "Expr", "X"]
@@ -1,4 +1,4 @@
-from typing import Union
+from typing import Any, Union
 
 import pytest
 
@@ -98,6 +98,680 @@ def test_result():
         res2.value()
 
 
+def test_batch():
+    """测试批量验证"""
+    res = INTEGER.execute_many(["1", 2, "abc", 3.0, True])
+    assert res.values == [1, 2, None, 3, 1]
+    assert res.failures == [2]
+    assert res.failed
+    assert isinstance(res.error(2), MatchFailed)
+    assert res.error(0) is None
+    assert res.error(9) is None
+    assert list(res.errors()) == [2]
+    assert len(res) == 5
+    assert FLOAT.execute_many(["1.5", 2, "x"]).values == [1.5, 2.0, None]
+    assert BOOLEAN.execute_many(["True", False, "1"]).failures == [2]
+    assert STRING.match_many(["a", b"b"]) == ["a", "b"]
+    with pytest.raises(MatchFailed):
+        INTEGER.match_many(["1", "a"])
+    pat = Pattern(int).accept(str).convert(lambda _, x: int(x))
+    res1 = pat.execute_many(["1", "a", 2])
+    assert res1.values == [1, None, None]
+    assert isinstance(res1.error(1), ValueError)
+    assert res1.error(2).code == "type"  # type: ignore
+    assert UnionPattern(INTEGER, BOOLEAN).execute_many(["1", "true"]).success
+
+
+def test_iter_execute(tmp_path):
+    """测试流式批量验证"""
+    from nepattern.func import Upper
+
+    file = tmp_path / "data.txt"
+    file.write_text("1\n2\r\nabc\n4\n5\n")
+    chunks = list(INTEGER.iter_execute(file, chunk_size=2))
+    assert [len(i) for i in chunks] == [2, 2, 1]
+    assert [i.offset for i in chunks] == [0, 2, 4]
+    assert chunks[1].failures == [0]
+    assert list(INTEGER.iter_match(str(file), chunk_size=2)) == [1, 2, 4, 5]
+    with file.open("rb") as f:
+        assert list(BYTES.iter_match(f)) == [b"1", b"2", b"abc", b"4", b"5"]
+    pat = Upper(Pattern.regex_match(r"[a-z]+"))
+    assert list(pat.iter_match(["ab", "1", "cd"], chunk_size=1)) == ["AB", "CD"]
+    with pytest.raises(ValueError):
+        next(INTEGER.iter_execute([1], chunk_size=0))
+
+
+def test_async():
+    """测试异步的验证与转换"""
+    import asyncio
+
+    from nepattern.func import Index, Map, Step
+
+    async def convert(self, x: str):
+        await asyncio.sleep(0)
+        return x if x.startswith("a") else None
+
+    async def validate(x: str):
+        return len(x) < 4
+
+    pat = Pattern(str).accept(str).convert(convert).post_validate(validate)
+    assert pat.is_async
+    assert not INTEGER.is_async
+    assert pat.execute("abc").failed
+    assert asyncio.run(pat.match_async("abc")) == "abc"
+    assert asyncio.run(pat.execute_async("bcd")).failed
+    assert asyncio.run(pat.execute_async("abcd")).failed
+    assert asyncio.run(pat.execute_async(1)).error().code == "type"  # type: ignore
+    assert asyncio.run(INTEGER.match_async("1")) == 1
+    assert asyncio.run(Step(pat, lambda x: x + "!").match_async("ab")) == "ab!"
+    assert asyncio.run(Map(LIST, lambda x: x * 2).match_async("[1,2]")) == [2, 4]
+    assert asyncio.run(Index(LIST, 0).execute_async("[[1,2],3]")).value() == [1, 2]
+    res = asyncio.run(pat.execute_many_async(["a", "b", "ab"], concurrency=2))
+    assert res.values == ["a", None, "ab"]
+    assert res.failures == [1]
+    assert asyncio.run(INTEGER.execute_many_async(["1", "x"])).failures == [1]
+    union = UnionPattern(INTEGER, pat)
+    union.concurrency = 1
+    assert union.is_async
+    assert asyncio.run(union.match_async("abc")) == "abc"
+    assert asyncio.run(union.match_async("12")) == 12
+    assert asyncio.run(union.execute_async("xyz")).failed
+
+
+def test_pickle():
+    """测试表达式的序列化"""
+    import pickle
+
+    from nepattern.func import Map, Sum, Upper
+
+    assert pickle.loads(pickle.dumps(INTEGER)) is INTEGER
+    assert pickle.loads(pickle.dumps(URL)) is URL
+    for pat in (
+        UnionPattern(INTEGER, "a", URL),
+        Sum(Map(LIST, int)),
+        Upper(STRING),
+        RegexPattern(r"a(\d)"),
+        SwitchPattern({"a": 1, ...: 2}),
+        AntiPattern(INTEGER),
+        Pattern(int),
+        combine(INTEGER, alias="int1"),
+        Pattern.regex_convert(r"\d+", int, int),
+    ):
+        new = pickle.loads(pickle.dumps(pat))
+        assert new is not pat
+        assert str(new) == str(pat)
+    assert pickle.loads(pickle.dumps(Sum(Map(LIST, int)))).match("[1, 2]") == 3
+    prefixed = combine(Pattern.regex_match(r"\d+"), alias="n").prefixed()
+    assert prefixed.execute("12a").success
+    assert pickle.loads(pickle.dumps(prefixed)).execute("12a").success
+    assert Pattern.from_spec(prefixed.to_spec()).execute("12a").success
+    assert STRING.copy() is not STRING
+
+
+def test_funcs_pipeline():
+    """测试 func 步骤的惰性流水线"""
+    from nepattern.func import Filter, Index, Join, Map, Slice, Sum, Upper
+
+    calls = []
+
+    def record(x):
+        calls.append(x)
+        return x * 2
+
+    tokens = Pattern(list).accept(str).convert(lambda _, x: x.split())
+    pat = Index(Map(Map(tokens, int), record), 1)
+    assert pat.match("1 2 3 4") == 4
+    assert calls == [1, 2]
+    calls.clear()
+    assert Slice(Map(Map(tokens, int), record), 0, 2).match("1 2 3 4") == [2, 4]
+    assert calls == [1, 2]
+    assert Slice(Map(tokens, int), -2).match("1 2 3 4") == [3, 4]
+    assert Index(Map(tokens, int), -1).match("1 2 3") == 3
+    assert Sum(Filter(Map(tokens, int), lambda x: x % 2)).match("1 2 3 4") == 4
+    assert Upper(Join(Map(tokens, str.lower), "-")).match("A B") == "A-B"
+    assert Map(Map(tokens, int), abs).match("-1 2") == [1, 2]
+    assert Slice(STRING, 1).match("abc") == "bc"
+    with pytest.raises(IndexError):
+        Index(Map(tokens, int), 5).match("1 2")
+    # combine 包装后的表达式不再沿用原有的流水线
+    limited = combine(Map(tokens, int), validator=lambda x: len(x) < 3)
+    assert not Map(limited, abs).execute("1 2 3").success
+    assert Map(limited, abs).match("-1 2") == [1, 2]
+    comma = Pattern(str).accept(str).convert(lambda _, x: x.replace(",", " "))
+    assert Sum(combine(Map(tokens, int), previous=comma)).match("1,2,3") == 6
+
+
+def test_funcs_vectorized():
+    """测试 func 步骤的向量化执行"""
+    import operator
+
+    np = pytest.importorskip("numpy")
+    from nepattern.func import Filter, Index, Map, Reduce, Sum, X
+
+    src = Pattern(list).accept(Any)
+    data = list(range(1000))
+    assert Sum(Map(Filter(src, X % 2 == 0), X * 3)).match(data) == sum(x * 3 for x in data if x % 2 == 0)
+    assert str(Map(src, X * 2 + 1)) == "list.map((X * 2) + 1)"
+    assert Map(src, X * 2).match([1, 2.5]) == [2, 5.0]
+    assert Map(src, X * 2).match([2**62]) == [2**63]
+    assert Sum(src).match([2**62, 2**62]) == 2**63
+    big = [2**53 + 1, 2**60 + 3]
+    assert Map(src, X / 3).match(big) == [i / 3 for i in big]
+    assert Filter(src, X > 2.0**53).match(big) == [i for i in big if i > 2.0**53]
+    assert Reduce(Map(src, np.sqrt), max).match([1.0, 4.0]) == 2.0
+    assert Reduce(src, operator.mul, 1).match(np.arange(1, 6)) == 120
+    assert Filter(src, (X > 1) & (X < 4)).match(np.arange(6)) == [2, 3]
+    assert Index(Map(src, X + 1), 1).match([1, 2, 3]) == 3
+    assert Map(src, X // 0).execute([1]).failed
+    assert Map(src, abs(-X)).match([1]) == [1]
+    floats = [i * 1.1 + 0.1 for i in range(3000)]
+    assert Sum(Map(src, X * 1.1)).match(floats) == Sum(Map(src, lambda x: x * 1.1)).match(floats)
+    assert Reduce(Map(src, X * 1.1), operator.add).match(floats) == sum(x * 1.1 for x in floats)
+
+
+def test_copy():
+    """测试表达式的结构化复制"""
+    from nepattern.func import Upper
+
+    switch = SwitchPattern({str(i): i for i in range(1000)})
+    new = switch.copy()
+    assert new is not switch
+    assert new.switch is switch.switch
+    assert new.match("10") == 10
+    pat = Upper(Pattern(str).accept(str))
+    new = pat.copy()
+    new.alias = "upper"
+    assert str(pat) == "str.upper()"
+    assert new.try_match.__self__ is new  # type: ignore
+    assert new.match("a") == "A"
+    regex = RegexPattern(r"a(\d)").prefixed()
+    assert regex.match("a1b")[0] == "a1"
+    base = Pattern(str).accept(str).convert(lambda _, x: x * 2)
+    copied = base.copy().convert(lambda _, x: x * 3)
+    assert base.match("a") == "aa"
+    assert copied.match("a") == "aaa"
+
+
+def test_spec():
+    """测试表达式的声明式序列化"""
+    import json
+
+    from nepattern.func import Map, Sum, Upper
+
+    def double(x):
+        return x * 2
+
+    register_ref(double, "double")
+    for pat in (
+        INTEGER,
+        UnionPattern(INTEGER, "a", None, URL),
+        Sum(Map(LIST, double)),
+        Upper(EMAIL),
+        RegexPattern(r"a(\d)"),
+        SwitchPattern({"a": 1, ...: 2}),
+        AntiPattern(INTEGER),
+        Pattern(list[str]).accept(Union[str, int]),
+        combine(INTEGER, alias="int1"),
+        DirectPattern(b"abc"),
+        Pattern.regex_convert(r"\d+", int, int),
+        parser(Union[int, None]),
+        ContainerPattern(dict, key=STRING, value=INTEGER, max_depth=4),
+    ):
+        spec = json.loads(json.dumps(pat.to_spec()))
+        new = Pattern.from_spec(spec)
+        assert str(new) == str(pat)
+        assert new.fingerprint() == pat.fingerprint()
+    assert Pattern.from_spec(INTEGER.to_spec()) is INTEGER
+    assert Pattern.from_spec(Sum(Map(LIST, double)).to_spec()).match("[1, 2]") == 6
+    assert INTEGER.fingerprint() != FLOAT.fingerprint()
+    with pytest.raises(TypeError):
+        Pattern(int).convert(lambda _, x: x).to_spec()
+    with pytest.raises(ValueError):
+        Pattern.from_spec({"version": 0, "pattern": {}})
+    call = {
+        "$": "call",
+        "func": {"$": "ref", "name": "builtins:print"},
+        "args": ["x"],
+        "kwargs": {},
+        "alias": None,
+    }
+    with pytest.raises(ValueError):
+        Pattern.from_spec({"version": 1, "pattern": call})
+    instance = {"$": "instance", "class": {"$": "ref", "name": "builtins:object"}, "alias": None}
+    with pytest.raises(ValueError):
+        Pattern.from_spec({"version": 1, "pattern": instance})
+
+
+def test_fingerprint_hash_seed():
+    """测试指纹不随哈希种子变化"""
+    import os
+    import subprocess
+    import sys
+
+    code = (
+        "from typing import Literal, Union; from nepattern import parser; "
+        "print(parser(Literal['a', 'b', 'c']).fingerprint(), parser(Union[int, str, float]).fingerprint())"
+    )
+    results = {
+        subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            check=True,
+            text=True,
+            env={**os.environ, "PYTHONHASHSEED": seed},
+        ).stdout
+        for seed in ("1", "2", "3")
+    }
+    assert len(results) == 1
+
+
+def test_literal():
+    """测试容器字面量的解析"""
+    assert LIST.execute("[1, [2.5, (3,)], {'a': {None, True}}]").value() == [
+        1,
+        [2.5, (3,)],
+        {"a": {None, True}},
+    ]
+    assert LIST.execute(r"['a\'b\n', b'\x00', r'\d', 0x1F, -1e3]").value() == [
+        "a'b\n",
+        b"\x00",
+        r"\d",
+        31,
+        -1000.0,
+    ]
+    assert TUPLE.execute("(1,)").value() == (1,)
+    assert TUPLE.execute("()").value() == ()
+    assert TUPLE.execute("(1)").failed
+    assert DICT.execute("{}").value() == {}
+    assert DICT.execute("{'a': 1, 'b': 2,}").value() == {"a": 1, "b": 2}
+    assert DICT.execute("{1, 2}").failed
+    assert SET.execute("{1, 2}").value() == {1, 2}
+    assert LIST.execute([1]).value() == [1]
+    assert LIST.execute(1).failed
+    for text in ("[1, 2", "[1 2]", "[1]]", "[__import__('os')]", "[().__class__]", "{[1]: 2}", "['a]"):
+        assert LIST.execute(text).failed
+    assert LIST.execute("[" * 32 + "]" * 32).success
+    assert LIST.execute("[" * 33 + "]" * 33).failed
+    assert ContainerPattern(list, max_size=3).execute("[1, [2]]").success
+    assert ContainerPattern(list, max_size=3).execute("[1, [2, 3]]").failed
+    with pytest.raises(LiteralError):
+        parse_literal("[1, 2] 3")
+
+    pat = ContainerPattern(list, INTEGER)
+    assert str(pat) == "list[int]"
+    assert pat.execute("[1, '2']").value() == [1, 2]
+    assert pat.execute(["3"]).value() == [3]
+    res = pat.execute("[1, 'x']")
+    assert res.failed and res.error().target == "x"  # type: ignore
+    pat1 = ContainerPattern(dict, value=FLOAT)
+    assert str(pat1) == "dict[any, float]"
+    assert pat1.execute("{'a': '1.5'}").value() == {"a": 1.5}
+    with pytest.raises(TypeError):
+        ContainerPattern(list, key=INTEGER)
+
+
+def test_datetime_cache():
+    """测试时间解析的快速路径与缓存"""
+    import pickle
+    from datetime import datetime
+
+    from nepattern.base import DateTimePattern
+
+    assert DATETIME.execute("2020-01-01T12:00:00").value() == datetime(2020, 1, 1, 12)
+    assert DATETIME.execute("1600000000").value() == datetime.fromtimestamp(1600000000)
+    assert DATETIME.execute("1600000000.5").value() == datetime.fromtimestamp(1600000000.5)
+    assert DATETIME.execute("12:30").value().hour == 12
+    assert DATETIME.execute("2020/01/01").failed
+    assert DATETIME.cache_info() is None
+    assert DATETIME.execute("20240101").value() == datetime(2024, 1, 1)
+    assert DATETIME.execute("2024").failed
+
+    pat = DateTimePattern(["%Y/%m/%d %H:%M"], cache_size=2)
+    assert pat.execute("2020/01/01 12:00").value() == datetime(2020, 1, 1, 12)
+    assert pat.execute("2020/01/01 12:00").value() == datetime(2020, 1, 1, 12)
+    assert pat.execute("2020-01-02").value() == datetime(2020, 1, 2)
+    assert pat.execute("x").failed
+    assert pat.cache_info() == (1, 3)
+    new = pickle.loads(pickle.dumps(pat))
+    assert new == pat
+    assert new.execute("2020/01/01 12:00").value() == datetime(2020, 1, 1, 12)
+    assert Pattern.from_spec(pat.to_spec()).formats == ("%Y/%m/%d %H:%M",)
+
+
+def test_file(tmp_path):
+    """测试文件读取的各模式与大小限制"""
+    file = tmp_path / "data.bin"
+    file.write_bytes(b"abc" * 100)
+    assert PathFile.execute(str(file)).value() == b"abc" * 100
+    assert PathFile.execute(b"raw").value() == b"raw"
+    assert PathFile.execute(str(tmp_path)).failed
+    assert PathFile.execute(str(tmp_path / "missing")).failed
+    assert PathFile.execute(1).failed
+
+    view = FilePattern("mmap").execute(file).value()
+    assert isinstance(view, memoryview) and view[:3] == b"abc" and view.readonly
+    (tmp_path / "empty").write_bytes(b"")
+    assert FilePattern("mmap").execute(tmp_path / "empty").value() == b""
+    assert FilePattern("lazy").execute(str(file)).value() == file
+    assert FilePattern("lazy").execute(b"raw").failed
+
+    limited = FilePattern(max_size=299)
+    assert limited.execute(file).failed
+    assert limited.execute(b"a" * 300).failed
+    assert FilePattern("lazy", max_size=300).execute(file).success
+    assert Pattern.from_spec(limited.to_spec()) == limited
+
+    import os
+
+    if hasattr(os, "mkfifo"):
+        os.mkfifo(fifo := tmp_path / "fifo")
+        assert PathFile.execute(fifo).failed
+        assert FilePattern("mmap").execute(fifo).failed
+
+
+def test_type_checker():
+    """测试类型表达式的预编译检查"""
+    from typing import List, Literal, Optional, TypeVar
+
+    from tarina import generic_isinstance
+
+    from nepattern.util import _InLiteral, _IsInstance, type_checker
+
+    assert type_checker(Any) is None
+    assert type_checker(Union[int, Any]) is None
+    assert isinstance(checker := type_checker(Union[int, str, Optional[bytes]]), _IsInstance)
+    assert checker.types == (int, str, bytes, type(None))
+    assert isinstance(type_checker(Literal["a", 1]), _InLiteral)
+    tps = [
+        int,
+        Union[int, Literal["x"], List[str]],
+        dict[str, int],
+        tuple[int, ...],
+        tuple[int, str],
+        TypeVar("T", int, str),
+        Literal["a", None],
+    ]
+    for tp in tps:
+        check = type_checker(tp)
+        for value in (1, "a", "x", None, True, [1], ["a"], {"a": 1}, {"a": "b"}, (1, 2), (1, "a"), [[1]]):
+            assert check(value) == generic_isinstance(value, tp)  # type: ignore
+    pat = Pattern(list[int]).accept(Union[str, list[int]])
+    assert pat.execute([1, 2]).success
+    assert pat.execute([1, "2"]).failed
+    assert pat.execute(1).error().code == "type"  # type: ignore
+
+
+def test_deep_check():
+    """测试泛型容器元素的检查策略"""
+    import json
+    from typing import Annotated
+
+    data = list(range(100)) + ["x"]
+    assert parser(list[int]).execute(data).failed
+    assert parser(Annotated[list[int], DeepCheck("first", 10)]).execute(data).success
+    assert parser(Annotated[list[int], DeepCheck("first", 10)]).execute(["x"]).failed
+    assert parser(Annotated[list[int], DeepCheck("sample", 200)]).execute(data).failed
+    assert parser(Annotated[list[int], DeepCheck("sample", 10)]).execute([1] * 50).success
+    assert parser(Annotated[list[int], DeepCheck("shallow")]).execute(["x"]).success
+    assert parser(Annotated[list[int], DeepCheck("shallow")]).execute(("x",)).failed
+    nested = parser(Annotated[dict[str, list[int]], DeepCheck("first", 2)])
+    assert nested.execute({"a": [1, 2, "x"], "b": [1], "c": "x"}).success
+    assert nested.execute({"a": ["x"]}).failed
+    with pytest.raises(ValueError):
+        DeepCheck("partial")  # type: ignore
+
+    from nepattern.util import type_checker
+
+    check = type_checker(Annotated[tuple[int, ...], DeepCheck(cache=4)])
+    value = tuple(range(10))
+    assert check(value)  # type: ignore
+    assert check._cache.get(id(value)) is value  # type: ignore
+    assert check(value)  # type: ignore
+    assert not check((1, "x"))  # type: ignore
+    assert parser(Annotated[tuple[int, ...], DeepCheck(cache=4)]).execute(value).success
+
+    spec = json.loads(json.dumps(nested.to_spec()))
+    assert Pattern.from_spec(spec).execute({"a": [1, 2, "x"]}).success
+
+
+def test_adaptive():
+    """测试自适应的内联缓存与子表达式排序"""
+    from typing import Literal, SupportsInt
+
+    pat = Pattern(int).accept(Union[SupportsInt, str]).convert(lambda _, x: int(x))
+    assert pat.adaptive_info() is None
+    pat.adaptive()
+    assert pat.match("1") == 1
+    assert pat.match("2") == 2
+    assert pat.match(3.5) == 3
+    assert pat.execute(b"1").failed
+    assert pat.adaptive_info() == (1, 3)
+    assert pat.adaptive(False).adaptive_info() is None
+
+    union = UnionPattern(EMAIL, URL, INTEGER).adaptive()
+    for _ in range(3):
+        assert union.match("123") == 123
+    assert union.match("a@b.c") == "a@b.c"
+    assert union._dispatch[str][0] is EMAIL
+    assert union.adaptive_info() == (1, 3)
+    assert union.match(1) == 1
+    numbers = UnionPattern(INTEGER, FLOAT).adaptive()
+    assert [numbers.match(i) for i in ("1", "1.5", "2.5", "3.5", "1")] == [1, 1.5, 2.5, 3.5, 1]
+    assert type(numbers.match("1")) is int
+
+    words = Pattern(str).accept(Literal["a", "b"]).convert(lambda _, x: x.upper())
+    keys = SwitchPattern({"x": 1, "y": 2})
+    literals = UnionPattern(words, keys).adaptive()
+    for _ in range(3):
+        assert literals.match("x") == 1
+    assert literals.match("a") == "A"
+    assert literals._dispatch[str][0] is keys
+    assert literals.adaptive_info() == (2, 2)
+
+    Pattern.adaptive_default = True
+    try:
+        assert UnionPattern(EMAIL, INTEGER).execute("1").success
+        assert Pattern(int).accept(int).adaptive_info() == (0, 0)
+    finally:
+        Pattern.adaptive_default = False
+
+
+def test_stats():
+    """测试运行时统计与导出"""
+    import threading
+
+    from nepattern import stats
+    from nepattern.func import Map, Sum
+
+    origin = INTEGER.__class__.try_match
+    pat = Pattern(int, "digits").accept(str).pre_validate(str.isdigit).convert(lambda _, x: int(x))
+    pat.post_validate(lambda x: x < 100)
+    pipe = Sum(Map(LIST, int))
+    stats.reset()
+    stats.enable()
+    try:
+        assert INTEGER.__class__.try_match is not origin
+        threads = [
+            threading.Thread(target=lambda: [INTEGER.execute("1") for _ in range(10)]) for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert INTEGER.execute("x").failed
+        assert UnionPattern(EMAIL, INTEGER).match("2") == 2
+        assert pipe.match("[1, 2]") == 3
+        for value in (1, "a", "500", "5"):
+            pat.execute(value)
+        late = combine(INTEGER, alias="late", validator=lambda x: x > 0)
+        assert late.execute("-1").failed
+    finally:
+        stats.disable()
+    # 值相同的两个表达式都需要被记录
+    twins = [combine(INTEGER, alias="twin", validator=bool) for _ in range(2)]
+    stats.enable()
+    try:
+        assert (
+            twins[0].execute("1").success and twins[1].execute("2").success and twins[1].execute("0").failed
+        )
+    finally:
+        stats.disable()
+    assert INTEGER.__class__.try_match is origin
+    INTEGER.execute("1")
+
+    data = stats.snapshot()
+    assert data["int"]["calls"] == 32
+    assert data["int"]["failures"] == 1
+    assert data["int"]["failed_stages"]["convert"] == 1
+    assert data["email"]["failures"] == 1
+    assert data["sum(list.map(int))"]["successes"] == 1
+    assert data["digits"]["failed_stages"] == {
+        "accept": 1,
+        "pre_validate": 1,
+        "convert": 0,
+        "post_validate": 1,
+        "error": 0,
+    }
+    assert data["late"]["failures"] == 1
+    assert data["twin"]["calls"] == 3
+    # 统计失败阶段时不会再次执行用户的验证函数
+    calls = []
+    recorded = Pattern(int, "recorded").accept(str).pre_validate(lambda x: calls.append(x) or x != "b")
+    stats.enable()
+    try:
+        assert recorded.execute("b").failed and recorded.execute("a").success
+    finally:
+        stats.disable()
+    assert calls == ["b", "a"]
+    assert stats.snapshot()["recorded"]["failed_stages"]["pre_validate"] == 1
+    assert data["int"]["max_seconds"] <= data["int"]["total_seconds"]
+    text = stats.to_prometheus()
+    assert 'nepattern_calls_total{pattern="int"} 32' in text
+    assert 'nepattern_failures_total{pattern="digits",stage="accept"} 1' in text
+    stats.reset()
+    assert stats.snapshot() == {}
+    # 批量验证时不走快速路径, 每一项都会被记录
+    stats.enable()
+    try:
+        assert INTEGER.execute_many(["1", "x"]).failures == [1]
+    finally:
+        stats.disable()
+    assert stats.snapshot()["int"]["calls"] == 2
+    stats.reset()
+
+
+def test_trace():
+    """测试求值追踪"""
+    from nepattern import stats
+    from nepattern.func import Map, Sum
+    from nepattern.trace import trace
+
+    origin = Pattern.try_match
+    pat_a = Pattern(int, "A").accept(str).pre_validate(lambda x: x[0] == "a").convert(lambda _, x: int(x[1:]))
+    pat_b = Pattern(int, "B").accept(str).pre_validate(lambda x: x[0] == "b").convert(lambda _, x: int(x[1:]))
+    split = Pattern(list, alias="split").accept(str).convert(lambda _, x: x.split(";"))
+    pat = Sum(Map(split, UnionPattern(pat_a, pat_b).match))
+    assert pat.execute("a1;b2").trace is None
+
+    res = pat.execute("a1;b2", trace=True)
+    assert res.value() == 3
+    root = res.trace
+    assert root and root.name == "sum(split.map(match))" and root.outcome == "success"
+    assert [(i.name, i.kind) for i in root.children] == [
+        ("source", "source"),
+        ("map", "step"),
+        ("sum", "step"),
+    ]
+    assert [i.name for i in root.children[0].children] == ["accept", "convert"]
+    second = root.children[1].children[1]
+    assert second.name == "A|B"
+    assert [(i.name, i.outcome) for i in second.children] == [("A", "failed"), ("B", "success")]
+    assert second.children[0].children[1].name == "pre_validate"
+    assert second.children[0].children[1].outcome == "failed"
+    assert all(i.elapsed >= 0 for i in root.walk())
+    assert "pre_validate [stage] failed" in root.format()
+    # 追踪与否的结果一致, 包括被 combine 包装的流水线
+    limited = combine(Map(split, len), validator=lambda x: len(x) < 2)
+    for input_ in ("a1;b2", "a1"):
+        traced, plain = limited.execute(input_, trace=True), limited.execute(input_)
+        assert traced.success == plain.success and traced._value == plain._value
+
+    events = []
+    with trace(events.append) as top:
+        assert combine(pat_a, alias="pos", validator=lambda x: x > 0).execute("a0").failed
+        INTEGER.execute("1")
+    assert [i.name for i in top.children] == ["pos", "int"]
+    twins = [combine(INTEGER, alias="twin", validator=bool) for _ in range(2)]
+    assert twins[1].execute("1", trace=True).trace.name == "twin"  # type: ignore
+    assert top.outcome == "failed"
+    assert [i.name for i in events] == ["pos", "int"]
+
+    stats.reset()
+    stats.enable()
+    try:
+        assert pat_a.execute("a5", trace=True).trace.children[-1].name == "convert"  # type: ignore
+    finally:
+        stats.disable()
+    assert stats.snapshot()["A"]["calls"] == 1
+    stats.reset()
+    assert Pattern.try_match is origin
+
+
+def test_parallel():
+    """测试多进程批量验证"""
+    from nepattern.func import Upper
+
+    res = INTEGER.execute_many(["1", "x", 3] * 3, workers=2)
+    assert res.values == [1, None, 3] * 3
+    assert res.failures == [1, 4, 7]
+    assert isinstance(res.error(4), MatchFailed)
+    assert list(Upper(EMAIL).iter_match(["a@b.c", "x"] * 2, chunk_size=1, workers=2)) == ["A@B.C"] * 2
+
+
+def test_execute_array():
+    """测试向量化批量转换"""
+    np = pytest.importorskip("numpy")
+    res = INTEGER.execute_array(["1", "-2", " 3 ", "x", "9" * 30])
+    assert res.values.dtype == np.int64
+    assert res.mask.tolist() == [True, True, True, False, False]
+    assert res.values[:3].tolist() == [1, -2, 3]
+    assert res.failures == [3, 4]
+    assert not res.success
+    assert INTEGER.execute_array(np.arange(4)).values.tolist() == [0, 1, 2, 3]
+    data = ["1.5", "-0.25", "1e3", ".5", "1.2.3"]
+    res = FLOAT.execute_array(data)
+    assert res.mask.tolist() == [True, True, True, True, False]
+    assert res.values[:4].tolist() == [1.5, -0.25, 1000.0, 0.5]
+    assert BOOLEAN.execute_array(["True", "false", "1"]).mask.tolist() == [True, True, False]
+    assert WIDE_BOOLEAN.execute_array(["yes", 0, "no"]).values[:2].tolist() == [True, False]
+    res = DATETIME.execute_array(["2021-03-20", "2021-03-20T12:00:00", "x"])
+    assert res.values.dtype == np.dtype("datetime64[us]")
+    assert res.failures == [2]
+    for data in (
+        ["20240101", "1700000000", "2024", "2024-01"],
+        ["2021-03-20 08:30", "2021-03-20T12:00:00.123", "2021-03-20"],
+        ["2021-02-30", "2021-03-20"],
+    ):
+        res = DATETIME.execute_array(data)
+        for index, input_ in enumerate(data):
+            expected = DATETIME.execute(input_)
+            assert res.mask[index] == expected.success
+            if expected.success:
+                assert res.values[index] == np.datetime64(expected.value())
+
+
+def test_execute_array_fallback(monkeypatch):
+    """测试无 NumPy 时的向量化批量转换"""
+    import nepattern.vector
+
+    monkeypatch.setattr(nepattern.vector, "np", None)
+    res = INTEGER.execute_array(["1", "x", 3])
+    assert res.values.typecode == "q"
+    assert res.failures == [1]
+    assert res.values[0] == 1 and res.values[2] == 3
+    assert FLOAT.execute_array(["1.5"]).values.tolist() == [1.5]
+
+
 def test_pattern_of():
     """测试 Pattern 的快速创建方法之一, 对类有效"""
     pat = Pattern(int)
@@ -210,6 +884,65 @@ def test_pattern_pre_validator():
     print(pat7)
 
 
+def test_try_match():
+    """测试不抛出异常的匹配协议"""
+    res = INTEGER.try_match("abc")
+    assert isinstance(res, Unmatched)
+    assert res.code == "content"
+    assert isinstance(res.error(), MatchFailed)
+    assert INTEGER.try_match("123") == 123
+    assert isinstance(Pattern(int).accept(int).try_match("123"), Unmatched)
+    assert isinstance(AntiPattern(INTEGER).try_match(123), Unmatched)
+    assert isinstance(Pattern.regex_match(r"\d+").try_match("abc"), Unmatched)
+    assert isinstance(UnionPattern(INTEGER, BOOLEAN).try_match("abc"), Unmatched)
+    res1 = UnionPattern(INTEGER, BOOLEAN).execute("abc")
+    assert isinstance(res1.error(), MatchFailed)
+
+    class OldPattern(Pattern[int]):
+        def match(self, input_):
+            if input_ != 1:
+                raise MatchFailed("not one")
+            return input_
+
+    assert OldPattern(int).execute(1).value() == 1
+    assert OldPattern(int).execute(2).failed
+    assert UnionPattern(OldPattern(int), BOOLEAN).execute("true").value() is True
+    assert str(OldPattern(int).execute(2).error()) == "not one"
+
+    class SuperPattern(Pattern[int]):
+        def match(self, input_):
+            return super().match(input_) * 2
+
+    class DeeperPattern(SuperPattern):
+        def match(self, input_):
+            return super().match(input_) + 1
+
+    assert SuperPattern(int).match(2) == 4
+    assert SuperPattern(int).execute("2").failed
+    assert DeeperPattern(int).execute(2).value() == 5
+    assert isinstance(DeeperPattern(int).try_match("2"), Unmatched)
+
+    double = Pattern(int).accept(int)
+    origin_match = double.match
+    double.match = lambda x: origin_match(x) * 2
+    assert double.execute(2).value() == 4
+    assert double.execute("2").failed
+    assert UnionPattern(double, "x").execute(3).value() == 6
+
+
+def test_match_failed():
+    """测试 MatchFailed 的结构化错误信息"""
+    err = INTEGER.execute("abc").error()
+    assert isinstance(err, MatchFailed)
+    assert err.code == "content"
+    assert err.target == "abc"
+    assert err.expected == "int"
+    assert "abc" in str(err)
+    assert STRING.execute(123).error().code == "type"  # type: ignore
+    assert str(MatchFailed("custom")) == "custom"
+    assert MatchFailed("custom").code is None
+
+
 def test_pattern_anti():
     """测试 Pattern 的反向验证功能"""
     pat8 = Pattern(int)
@@ -236,6 +969,23 @@ def test_pattern_post_validator():
     print(pat10)
 
 
+def test_pattern_compile():
+    """测试 Pattern 的编译, 修改阶段后会重新构建匹配函数"""
+    pat10_1 = Pattern(int).accept(str).convert(lambda _, x: int(x) if x.isdigit() else None)
+    assert pat10_1._compiled is None
+    assert pat10_1.execute("123").value() == 123
+    assert pat10_1._compiled
+    assert pat10_1.execute(123).failed
+    assert pat10_1.execute("abc").failed
+    pat10_1.post_validate(lambda x: x > 200)
+    assert pat10_1._compiled is None
+    assert pat10_1.execute("123").failed
+    assert pat10_1.execute("321").value() == 321
+    pat10_1.accept(Union[str, int])
+    assert pat10_1.compile().execute(123).failed
+    assert Pattern().compile().match(123) == 123
+
+
 def test_parser():
     from typing import Literal, Protocol, Type, TypeVar, Sequence
     from typing_extensions import Annotated
@@ -293,6 +1043,33 @@ def test_parser():
     assert pat11_8.execute((1, 2, 3)).success
 
 
+def test_parser_cache():
+    """测试 parser 的缓存, 表达式组被修改或切换时失效"""
+    from typing import List
+
+    assert parser(List[int]) is parser(List[int])
+    assert parser(123) is parser(123)
+    assert parser(True) is not parser(1)
+    assert parser([1, 2]) is not parser([1, 2])
+    assert parser("cache_test") == DirectPattern("cache_test")
+    temp = create_local_patterns("cache", {"cache_test": INTEGER})
+    assert parser("cache_test") is INTEGER
+    reset_local_patterns()
+    assert parser("cache_test") == DirectPattern("cache_test")
+    switch_local_patterns("cache")
+    assert parser("cache_test") is INTEGER
+    temp["cache_test"] = FLOAT
+    assert parser("cache_test") is FLOAT
+    temp.remove(float, "cache_test")
+    assert parser("cache_test") == DirectPattern("cache_test")
+    reset_local_patterns()
+    pat = parser(complex)
+    global_patterns().set(Pattern(complex, "complex"))
+    assert parser(complex) is not pat
+    global_patterns().remove(complex, "complex")
+    global_patterns().remove(complex)
+
+
 def test_union_pattern():
     from typing import List, Optional, Union, Annotated
 
@@ -322,6 +1099,36 @@ def test_union_pattern():
     assert pat12_4.execute("yes").value() is True
 
 
+def test_union_dispatch():
+    """测试 UnionPattern 按输入类型筛选子表达式"""
+    pat12_5 = UnionPattern(
+        HEX, Pattern(int), Pattern(bytes).accept(str).convert(lambda _, x: x.encode()), "foo", [1]
+    )
+    assert pat12_5.execute("foo").value() == "foo"
+    assert pat12_5.execute([1]).value() == [1]
+    assert pat12_5.execute(123).value() == 123
+    assert pat12_5.execute("0xff").value() == 255
+    assert pat12_5.execute("bar").value() == b"bar"
+    assert pat12_5.execute(1.5).failed
+    assert pat12_5._dispatch[int] == (pat12_5.for_validate[1],)
+    assert pat12_5._dispatch[str] == (HEX, pat12_5.for_validate[2])
+    assert pat12_5._dispatch[float] == ()
+    pat12_6 = combine(INTEGER, Pattern(str).accept(str).convert(lambda _, x: x.replace(",", "")))
+    assert UnionPattern(pat12_6, NONE).execute("1,000").value() == 1000
+
+    from nepattern.func import Dot
+
+    class Loose(Pattern[int]):
+        def __init__(self):
+            super().__init__(int, "loose")
+
+        def match(self, input_):
+            return int(input_)
+
+    assert UnionPattern(Loose(), "x").execute("1").value() == 1
+    assert UnionPattern(Dot(Pattern(complex), float, "real"), "x").execute(2j + 1).value() == 1.0
+
+
 def test_converters():
     pattern_map = all_patterns()
     print(pattern_map)
@@ -429,6 +1236,72 @@ def test_patterns():
         switch_local_patterns("temp2")
 
 
+def test_patterns_context():
+    """测试 local 表达式组在线程与 asyncio 任务间的隔离"""
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    create_local_patterns("ctx1", {"ctx": INTEGER}, set_current=False)
+    create_local_patterns("ctx2", {"ctx": FLOAT}, set_current=False)
+
+    with using_local_patterns("ctx1") as ctx1:
+        assert ctx1["ctx"] is INTEGER
+        assert parser("ctx") is INTEGER
+        with using_local_patterns("ctx2"):
+            assert parser("ctx") is FLOAT
+        assert parser("ctx") is INTEGER
+    assert parser("ctx") == DirectPattern("ctx")
+
+    with pytest.raises(KeyError):
+        with using_local_patterns("ctx3"):
+            pass
+
+    def worker(name):
+        switch_local_patterns(name)
+        return [parser("ctx") for _ in range(100)]
+
+    with ThreadPoolExecutor(4) as pool:
+        res1, res2 = pool.map(worker, ["ctx1", "ctx2"])
+    assert all(i is INTEGER for i in res1)
+    assert all(i is FLOAT for i in res2)
+    assert local_patterns().name == "$temp"
+
+    async def task(name):
+        switch_local_patterns(name)
+        await asyncio.sleep(0)
+        return parser("ctx")
+
+    async def main():
+        return await asyncio.gather(task("ctx1"), task("ctx2"))
+
+    assert asyncio.run(main()) == [INTEGER, FLOAT]
+    assert local_patterns().name == "$temp"
+
+
+def test_patterns_view():
+    """测试表达式组的只读视图与合并结果的缓存"""
+    temp = create_local_patterns("view", {"a": Pattern.on("A"), "int": FLOAT})
+    view = patterns_view()
+    assert view["a"] == Pattern.on("A")
+    assert view["int"] is FLOAT
+    assert view.get("float") is FLOAT
+    assert "url" in view
+    assert view.get("b") is None
+    merged = all_patterns()
+    assert merged is all_patterns()
+    assert merged["int"] is FLOAT
+    temp["b"] = Pattern.on("B")
+    assert all_patterns() is not merged
+    assert all_patterns()["b"] == Pattern.on("B")
+    merged = all_patterns()
+    merged["c"] = INTEGER
+    assert "c" not in all_patterns()
+    reset_local_patterns()
+    assert patterns_view().get("int") is INTEGER
+    assert local_patterns() is local_patterns()
+    assert not local_patterns().get("a")
+
+
 def test_rawstr():
     assert parser("url") == URL
     assert parser(RawStr("url")) == DirectPattern("url", "'url'")
@@ -461,6 +1334,42 @@ def test_forward_ref():
     assert pat21.execute(134.5).failed
 
 
+def test_forward_ref_cache():
+    """测试前向引用的缓存与失效"""
+    import pickle
+    import sys
+    import types
+    from typing import ForwardRef
+
+    from nepattern.base import ForwardRefPattern
+
+    module = types.ModuleType("_nepattern_fwd")
+    module.Foo = int  # type: ignore
+    sys.modules[module.__name__] = module
+    try:
+        pat = ForwardRefPattern(ForwardRef("Foo"), module)
+        assert pat.execute(1).success
+        module.Foo = str  # type: ignore
+        assert pat.execute(1).success
+        pat.invalidate()
+        assert pat.execute(1).failed
+        assert pat.execute("a").success
+        assert pickle.loads(pickle.dumps(pat)).execute("a").success
+        assert Pattern.from_spec(pat.to_spec()).execute("a").success
+
+        ns = {"Foo": int}
+        version = [0]
+        pat1 = ForwardRefPattern(ForwardRef("Foo"), ns, version=lambda: version[0])
+        assert pat1.execute(1).success
+        ns["Foo"] = str
+        assert pat1.execute(1).success
+        version[0] += 1
+        assert pat1.execute(1).failed
+        assert ForwardRefPattern(ForwardRef("Bar"), ns).execute(1).failed
+    finally:
+        del sys.modules[module.__name__]
+
+
 def test_value_operate():
     pat22 = Pattern(origin=int).convert(
         lambda _, x: x + 1,